@@ -0,0 +1,69 @@
+"""
+Compares writing formatted items one at a time, the previous saver loop, with the batched
+formatters.write_formatted for each kind of formatter.
+
+Usage:
+    python -m benchmarks.bench_formatters [--items 2000000] [--repeat 3]
+
+The items are written to a temporary file. default_formatter and int_formatter format each batch
+with a single % operation, formatter_str formatters without a function call per item and
+other formatters, i.e. custom_formatter, only save the per item write and newline check.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from gradschool.fs.formatters import (custom_formatter, default_formatter, format_output,
+                                      formatter_str, int_formatter, write_formatted)
+
+
+def per_item(path, items, formatter):
+    with open(path, 'w') as out:
+        for it in items:
+            out.write(format_output(it, formatter))
+
+
+def batched(path, items, formatter):
+    with open(path, 'w') as out:
+        write_formatted(out, items, formatter)
+
+
+def run(name, fn, path, items, formatter, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path, items, formatter)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-34s best of %d: %.3fs  %6.2f M items/s' % (name, repeat, best, len(items) / best / 1e6))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=2000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    ints = list(range(args.items))
+    urls = ['http://example.com/page/%d.html' % i for i in ints]
+    pairs = [(u, i) for i, u in enumerate(urls)]
+    cases = [
+        ('default_formatter (str)', urls, default_formatter),
+        ('int_formatter', ints, int_formatter),
+        ("formatter_str('%s,%d')", pairs, formatter_str('%s,%d')),
+        ("custom_formatter('%s,%d')", pairs, custom_formatter(lambda p: (p[0], p[1]), '%s,%d')),
+    ]
+    fd, path = tempfile.mkstemp(prefix='gs-formatters-bench-', suffix='.txt')
+    os.close(fd)
+    try:
+        for name, items, formatter in cases:
+            old = run('%s per item' % name, per_item, path, items, formatter, args.repeat)
+            new = run('%s batched' % name, batched, path, items, formatter, args.repeat)
+            print('%-34s %.2fx' % ('speedup', old / new))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
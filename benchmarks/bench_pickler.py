@@ -0,0 +1,90 @@
+"""
+Compares dumping and loading a large buffer backed object with the default pickle protocol and with
+protocol 5 out-of-band buffers, loaded by reading them into memory or memory mapping them.
+
+Usage:
+    python -m benchmarks.bench_pickler [--mb 512] [--repeat 3]
+
+A numpy array is used when numpy is installed, otherwise an object exposing its data through
+pickle.PickleBuffer the same way numpy arrays do. Peak memory is the peak of the Python heap
+allocations traced by tracemalloc, memory mapped buffers are backed by the page cache and are not counted.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pickle import PickleBuffer
+
+from gradschool.fs.pickler import buffers_path, dump_pickle, read_pickle
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Matrix(object):
+    """
+    Minimal buffer backed object supporting out-of-band pickling, standing in for a numpy array
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return Matrix, (PickleBuffer(self.data),)
+        return Matrix, (bytes(self.data),)
+
+
+def make_object(mb):
+    nbytes = mb << 20
+    if np is not None:
+        return {'features': np.random.random(nbytes // 8), 'labels': list(range(1000))}
+    return {'features': Matrix(bytearray(os.urandom(nbytes))), 'labels': list(range(1000))}
+
+
+def measure(fn, repeat):
+    best = None
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del result
+        best = elapsed if best is None else min(best, elapsed)
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=int, default=512, help='Size of the buffer in MiB')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    obj = make_object(args.mb)
+    print('object: %s, %d MiB' % ('numpy array' if np is not None else 'PickleBuffer backed object', args.mb))
+    fd, path = tempfile.mkstemp(prefix='gs-pickler-bench-', suffix='.pkl')
+    os.close(fd)
+    try:
+        cases = [
+            ('default protocol', dict(), dict()),
+            ('protocol 5 out-of-band, read', dict(out_of_band=True), dict(use_mmap=False)),
+            ('protocol 5 out-of-band, mmap', dict(out_of_band=True), dict(use_mmap=True)),
+        ]
+        for name, dump_kwargs, load_kwargs in cases:
+            dump_time, dump_peak = measure(lambda: dump_pickle(obj, path, **dump_kwargs), args.repeat)
+            load_time, load_peak = measure(lambda: read_pickle(path, **load_kwargs), args.repeat)
+            print('%-30s dump %.3fs peak %7.1f MiB | load %.3fs peak %7.1f MiB' % (
+                name, dump_time, dump_peak / (1 << 20), load_time, load_peak / (1 << 20)))
+    finally:
+        for p in (path, buffers_path(path)):
+            if os.path.exists(p):
+                os.remove(p)
+
+
+if __name__ == '__main__':
+    main()
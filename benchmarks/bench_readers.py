@@ -0,0 +1,92 @@
+"""
+Compares the text mode read_plaintext generator with its memory mapped binary, lazy and batched modes.
+
+Each mode runs a mapper that only needs a prefix of the line, the common case for selecting lines.
+
+Usage:
+    python -m benchmarks.bench_readers [--lines 2000000] [--width 0] [--repeat 3] [--file PATH]
+
+The mapped modes avoid decoding, so their advantage grows with the length of the lines (--width).
+For short lines the per line object overhead dominates and the C level text mode iterator is faster.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from gradschool.fs.readers import read_plaintext
+
+PREFIX = 'http'
+BPREFIX = b'http'
+
+
+def make_file(path, lines, width):
+    padding = 'x' * width
+    with open(path, 'w') as out:
+        for i in range(lines):
+            if i % 2:
+                out.write('http://example.com/some/crawled/page/%d.html %s\n' % (i, padding))
+            else:
+                out.write('urn:example:record:%d some trailing metadata for the record %s\n' % (i, padding))
+
+
+def text_mode(path):
+    return sum(1 for line in read_plaintext(path, mapper=lambda l: l.startswith(PREFIX)) if line)
+
+
+def text_batched(path):
+    return sum(sum(batch) for batch in read_plaintext(
+        path, batch_size=4096, mapper=lambda ls: [l.startswith(PREFIX) for l in ls]))
+
+
+def binary_mode(path):
+    return sum(1 for line in read_plaintext(path, binary=True, mapper=lambda l: l[:4] == BPREFIX) if line)
+
+
+def lazy_mode(path):
+    return sum(1 for line in read_plaintext(path, lazy=True, mapper=lambda l: l.startswith(BPREFIX)) if line)
+
+
+def binary_batched(path):
+    return sum(sum(batch) for batch in read_plaintext(
+        path, binary=True, batch_size=4096, mapper=lambda ls: [l[:4] == BPREFIX for l in ls]))
+
+
+def run(name, fn, path, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-26s matched=%-9d best of %d: %.3fs' % (name, result, repeat, best))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=2000000)
+    parser.add_argument('--width', type=int, default=0, help='Extra characters added to each line')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--file', default=None, help='Read an existing file instead of a generated one')
+    args = parser.parse_args()
+    path = args.file
+    tmp = None
+    if path is None:
+        fd, tmp = tempfile.mkstemp(prefix='gs-readers-bench-', suffix='.txt')
+        os.close(fd)
+        make_file(tmp, args.lines, args.width)
+        path = tmp
+    try:
+        run('text (current)', text_mode, path, args.repeat)
+        run('text batched', text_batched, path, args.repeat)
+        run('binary (mmap)', binary_mode, path, args.repeat)
+        run('lazy (mmap)', lazy_mode, path, args.repeat)
+        run('binary (mmap) batched', binary_batched, path, args.repeat)
+    finally:
+        if tmp is not None:
+            os.remove(tmp)
+
+
+if __name__ == '__main__':
+    main()
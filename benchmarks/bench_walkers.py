@@ -0,0 +1,104 @@
+"""
+Compares the pathlib.Path.iterdir based recursive walk the walkers used to be built on
+with the os.scandir based rlist_dir and rscandir.
+
+Reports wall time and the number of stat calls made from Python (os.stat / os.lstat,
+which is what pathlib.Path.is_dir uses) for each implementation.
+For the real syscall counts run the script under `strace -c -f -e trace=%stat,getdents64`.
+
+Usage:
+    python -m benchmarks.bench_walkers [--dirs 200] [--files 200] [--repeat 3] [--root PATH]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+from gradschool.fs.walkers import rlist_dir, rscandir
+
+
+def iterdir_rlist_dir(dirpath):
+    """The Path.iterdir + Path.is_dir walk rlist_dir used before switching to os.scandir"""
+    q = deque([Path(dirpath)])
+    while q:
+        cur = q.popleft()
+        for item in cur.iterdir():
+            yield item
+            if item.is_dir():
+                q.append(item)
+
+
+class StatCounter(object):
+    """Counts the os.stat and os.lstat calls made while active"""
+
+    def __init__(self):
+        self.count = 0
+        self._stat = os.stat
+        self._lstat = os.lstat
+
+    def _wrap(self, fn):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return fn(*args, **kwargs)
+        return counted
+
+    def __enter__(self):
+        os.stat = self._wrap(self._stat)
+        os.lstat = self._wrap(self._lstat)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        os.stat = self._stat
+        os.lstat = self._lstat
+
+
+def make_tree(root, dirs, files):
+    for d in range(dirs):
+        dp = os.path.join(root, 'd%03d' % (d % 10), 'sub%04d' % d)
+        os.makedirs(dp, exist_ok=True)
+        for f in range(files):
+            with open(os.path.join(dp, 'f%05d.html' % f), 'w'):
+                pass
+
+
+def run(name, walk, root, repeat):
+    best = None
+    count = 0
+    stats = 0
+    for _ in range(repeat):
+        with StatCounter() as counter:
+            start = time.perf_counter()
+            count = sum(1 for _ in walk(root))
+            elapsed = time.perf_counter() - start
+        stats = counter.count
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-22s entries=%-9d stat calls=%-9d best of %d: %.3fs' % (name, count, stats, repeat, best))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dirs', type=int, default=200)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--root', default=None, help='Walk an existing directory instead of a generated tree')
+    args = parser.parse_args()
+    tmp = None
+    root = args.root
+    if root is None:
+        tmp = tempfile.mkdtemp(prefix='gs-walkers-bench-')
+        make_tree(tmp, args.dirs, args.files)
+        root = tmp
+    try:
+        run('Path.iterdir (old)', iterdir_rlist_dir, root, args.repeat)
+        run('rlist_dir (scandir)', rlist_dir, root, args.repeat)
+        run('rscandir', rscandir, root, args.repeat)
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
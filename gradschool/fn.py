@@ -1,5 +1,27 @@
-from collections import defaultdict
-from functools import reduce, lru_cache
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import reduce, lru_cache, update_wrapper
+
+from .fs.pickler import dump_pickle, read_pickle
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'gradschool', 'memoize')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currentsize'])
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'expirations', 'currentsize', 'currentbytes'])
 
 
 def identity(x):
@@ -135,6 +157,359 @@ def memoize(fn, cachesize=128, typed=False):
     return memowrapper
 
 
+def _watched_stats(watch, args, keywords):
+    """
+    :return: Tuple of the (path, mtime_ns, size) of each watched file, missing files have a mtime_ns and size of -1
+    """
+    if watch is None:
+        return ()
+    paths = watch(*args, **keywords) if callable(watch) else watch
+    if isinstance(paths, (str, bytes, os.PathLike)):
+        paths = [paths]
+    stats = []
+    for path in paths:
+        path = os.fspath(path)
+        try:
+            st = os.stat(path)
+            stats.append((path, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stats.append((path, -1, -1))
+    return tuple(stats)
+
+
+def _stable_pickle(value):
+    """
+    :return: The pickle of a value without the memo, so equal values pickle the same whatever their identity
+    """
+    buf = io.BytesIO()
+    pickler = pickle.Pickler(buf, protocol=4)
+    pickler.fast = True
+    pickler.dump(value)
+    return buf.getvalue()
+
+
+def _code_identity(code):
+    """
+    :return: The bytecode, constants and referenced names of a code object and of the code objects nested in it
+    """
+    return ('code', code.co_code, _canonical(code.co_consts), code.co_names)
+
+
+def _canonical(value):
+    """
+    Converts a value into nested tuples of primitives that pickle the same in every process:
+    the items of sets and dicts are sorted by their pickles, since their iteration order follows the
+    per process string hashes, and code objects are replaced by their identity.
+    Other objects are pickled as is, so their keys are only stable if their pickles are
+    :return: The canonical form of the value
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return (type(value).__name__, tuple(_canonical(v) for v in value))
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__, tuple(sorted((_canonical(v) for v in value), key=_stable_pickle)))
+    if isinstance(value, dict):
+        return (type(value).__name__,
+                tuple(sorted(((_canonical(k), _canonical(v)) for k, v in value.items()), key=_stable_pickle)))
+    if isinstance(value, types.CodeType):
+        return _code_identity(value)
+    return ('object', _stable_pickle(value))
+
+
+def _function_identity(fn):
+    """
+    :return: The module, qualified name, code and defaults of a function, so results are not shared between
+    functions with the same name and are invalidated when the function's code or constants change.
+    Changes to the functions or globals it calls are not detected
+    """
+    code = getattr(fn, '__code__', None)
+    return (getattr(fn, '__module__', None), getattr(fn, '__qualname__', repr(fn)),
+            _code_identity(code) if code is not None else None,
+            _canonical(getattr(fn, '__defaults__', None)), _canonical(getattr(fn, '__kwdefaults__', None)))
+
+
+@contextmanager
+def _locked(path):
+    """
+    Holds an exclusive flock on the lock file for the duration of the with block,
+    a no-op where fcntl is not available
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _cache_entries(cachedir):
+    """
+    :return: List of the (mtime, size, path) of each entry in the cache directory
+    """
+    entries = []
+    with os.scandir(cachedir) as it:
+        for entry in it:
+            if entry.name.endswith('.pkl'):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    return entries
+
+
+def _evict(cachedir, maxbytes):
+    """
+    Removes the least recently used entries until the cache directory holds at most maxbytes
+    :return: The number of bytes the cache directory holds
+    """
+    entries = _cache_entries(cachedir)
+    used = sum(size for _, size, _ in entries)
+    if used <= maxbytes:
+        return used
+    entries.sort()
+    for _, size, path in entries:
+        if used <= maxbytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        used -= size
+    return used
+
+
+def disk_memoize(fn, cachedir=None, maxbytes=None, watch=None, protocol=None):
+    """
+    Memoizes the supplied function fn on disk, so its results are reused across runs and processes.
+    Results are keyed by the sha256 of the function identity (module, qualified name, bytecode, constants and
+    defaults) and arguments, pickled in a canonical form with sets and dicts sorted, so the key is the same in
+    every process. Positional and keyword arguments must be picklable. Results are saved with fs.pickler
+    to a temporary file that atomically replaces the entry.
+    Each hit touches the entry's mtime and when the entries of the function exceed maxbytes the least
+    recently used are removed while holding a flock, so several processes can share the cache directory.
+    With watch the mtime and size of files are part of the key, so results are invalidated when they change.
+
+    Example:
+        parse = disk_memoize(parse_warc, maxbytes=1 << 30, watch=lambda path: path)
+
+    :param fn: The function to memoize
+    :param cachedir: Optional directory the results are saved to, in a subdirectory per function.
+    Defaults to $XDG_CACHE_HOME/gradschool/memoize
+    :param maxbytes: Optional maximum number of bytes of results of the function kept on disk. Defaults to unbounded
+    :param watch: Optional path or list of paths of files the results depend on, or a function called with the
+    arguments of fn returning them
+    :param protocol: Optional pickle protocol results are saved with. Defaults to pickle.DEFAULT_PROTOCOL
+    :return: The memoized function, with cache_info, cache_clear and cache_dir like memoize's
+    """
+    fn_identity = _function_identity(fn)
+    name = '%s.%s' % (fn_identity[0], fn_identity[1])
+    cachedir = os.path.join(os.fspath(cachedir) if cachedir is not None else DEFAULT_CACHE_DIR,
+                            ''.join(c if c.isalnum() or c in '._-' else '_' for c in name))
+    os.makedirs(cachedir, exist_ok=True)
+    lockp = os.path.join(cachedir, '.lock')
+    stats = {'hits': 0, 'misses': 0, 'used': None}
+    stats_lock = threading.Lock()
+
+    def entry_path(args, keywords):
+        key = _stable_pickle((fn_identity, _canonical(args), _canonical(keywords),
+                              _watched_stats(watch, args, keywords)))
+        return os.path.join(cachedir, '%s.pkl' % hashlib.sha256(key).hexdigest())
+
+    def memowrapper(*args, **keywords):
+        path = entry_path(args, keywords)
+        try:
+            result = read_pickle(path)
+        except FileNotFoundError:
+            pass
+        except (EOFError, pickle.UnpicklingError):
+            # a corrupt entry, i.e. written while the disk was full
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        else:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            with stats_lock:
+                stats['hits'] += 1
+            return result
+        result = fn(*args, **keywords)
+        tmp = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+        try:
+            dump_pickle(result, tmp, protocol=protocol)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        with stats_lock:
+            stats['misses'] += 1
+            if maxbytes is not None:
+                # the size is rescanned when the estimate exceeds maxbytes, picking up other processes' entries
+                used = stats['used'] if stats['used'] is not None else sum(e[1] for e in _cache_entries(cachedir))
+                used += size
+                if used > maxbytes:
+                    with _locked(lockp):
+                        used = _evict(cachedir, maxbytes)
+                stats['used'] = used
+        return result
+
+    def cache_info():
+        entries = _cache_entries(cachedir)
+        return CacheInfo(stats['hits'], stats['misses'], maxbytes, sum(size for _, size, _ in entries))
+
+    def cache_clear():
+        with _locked(lockp):
+            for _, _, path in _cache_entries(cachedir):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        with stats_lock:
+            stats['hits'] = stats['misses'] = 0
+            stats['used'] = None
+
+    memowrapper.cache_info = cache_info
+    memowrapper.cache_clear = cache_clear
+    memowrapper.cache_dir = cachedir
+    return update_wrapper(memowrapper, fn)
+
+
+def _make_key(args, keywords, typed):
+    """
+    :return: Hashable key of the positional and keyword arguments, including their types when typed
+    """
+    key = args
+    if keywords:
+        key += (_make_key,) + tuple(keywords.items())
+    if typed:
+        key += tuple(type(v) for v in args) + tuple(type(v) for v in keywords.values())
+    return key
+
+
+class _Flight(object):
+    """
+    A value being computed, that callers with the same key wait for instead of computing it again
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def bounded_memoize(fn, cachesize=128, maxbytes=None, ttl=None, sizer=sys.getsizeof, typed=False,
+                    clock=time.monotonic):
+    """
+    Memoizes the supplied function fn like memoize, bounding the cache by number of entries, total size in bytes
+    and age, with statistics of its use. Positional and keyword arguments must be hashable.
+    Entries are evicted least recently used first once there are more than cachesize of them or their total
+    size, as measured by sizer, exceeds maxbytes, values larger than maxbytes are not cached.
+    Entries older than ttl seconds are expired when next looked up.
+    Concurrent callers with the same arguments compute the value once, the others wait for its result
+    (or exception) instead.
+
+    Example:
+        fetch = bounded_memoize(fetch_robots, maxbytes=64 << 20, ttl=3600, sizer=len)
+        ...
+        log.info(fetch.cache_stats()._asdict())
+
+    :param fn: The function to memoize
+    :param cachesize: Optional maximum number of entries, None for unbounded. Defaults to 128
+    :param maxbytes: Optional maximum total size of the cached values. Defaults to unbounded
+    :param ttl: Optional number of seconds an entry is kept. Defaults to forever
+    :param sizer: Function returning the size of a value in bytes. Defaults to sys.getsizeof, which does not
+    include the objects a container refers to. Every cached value is sized so currentbytes is reported
+    even without maxbytes
+    :param typed: Should the type of the argument be considered. Defaults to false.
+    :param clock: Function returning the current time in seconds. Defaults to time.monotonic
+    :return: The memoized function, with cache_info and cache_clear like memoize's
+    and cache_stats returning the CacheStats counters
+    """
+    cache = OrderedDict()
+    flights = {}
+    lock = threading.Lock()
+    stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'bytes': 0}
+
+    def evict():
+        while cache and ((cachesize is not None and len(cache) > cachesize)
+                         or (maxbytes is not None and stats['bytes'] > maxbytes)):
+            _, (_, _, size) = cache.popitem(last=False)
+            stats['bytes'] -= size
+            stats['evictions'] += 1
+
+    def memowrapper(*args, **keywords):
+        key = _make_key(args, keywords, typed)
+        with lock:
+            entry = cache.get(key)
+            if entry is not None:
+                if ttl is None or clock() - entry[1] < ttl:
+                    cache.move_to_end(key)
+                    stats['hits'] += 1
+                    return entry[0]
+                del cache[key]
+                stats['bytes'] -= entry[2]
+                stats['expirations'] += 1
+            flight = flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = flights[key] = _Flight()
+                stats['misses'] += 1
+            else:
+                stats['hits'] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            result = fn(*args, **keywords)
+            size = sizer(result)
+        except BaseException as error:
+            flight.error = error
+            with lock:
+                del flights[key]
+            flight.done.set()
+            raise
+        flight.result = result
+        with lock:
+            # cached before the flight ends so no caller computes the value again in between
+            if maxbytes is None or size <= maxbytes:
+                cache[key] = (result, clock(), size)
+                stats['bytes'] += size
+                evict()
+            del flights[key]
+        flight.done.set()
+        return result
+
+    def cache_stats():
+        with lock:
+            return CacheStats(stats['hits'], stats['misses'], stats['evictions'], stats['expirations'],
+                              len(cache), stats['bytes'])
+
+    def cache_info():
+        with lock:
+            return CacheInfo(stats['hits'], stats['misses'], cachesize, len(cache))
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            for name in stats:
+                stats[name] = 0
+
+    memowrapper.cache_stats = cache_stats
+    memowrapper.cache_info = cache_info
+    memowrapper.cache_clear = cache_clear
+    return update_wrapper(memowrapper, fn)
+
+
 def T(x=None):
     """
     Function that allways returns True
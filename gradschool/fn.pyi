@@ -1,14 +1,37 @@
-from typing import Any, Callable, DefaultDict, Hashable, Iterable, Iterator, List, NamedTuple, Optional
+from threading import Event
+from types import CodeType
+from typing import Any, Callable, ContextManager, DefaultDict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, \
+    Sequence, Tuple, Union
+
+fcntl: Any
+DEFAULT_CACHE_DIR: str
 
 CacheInfo = NamedTuple(
     'CacheInfo', [
         ('hits', int), ('misses', int), ('maxsize', Optional[int]), ('currentsize', int)])
 
+CacheStats = NamedTuple(
+    'CacheStats', [
+        ('hits', int), ('misses', int), ('evictions', int), ('expirations', int), ('currentsize', int),
+        ('currentbytes', int)])
+
 memowrapper = Callable[..., Any]
 memowrapper.cache_info = Callable[[], CacheInfo]
 memowrapper.cache_clear = Callable[[], None]
 memowrapper.__wrapped__ = Callable[..., Any]
 
+diskmemowrapper = Callable[..., Any]
+diskmemowrapper.cache_info = Callable[[], CacheInfo]
+diskmemowrapper.cache_clear = Callable[[], None]
+diskmemowrapper.cache_dir = str
+diskmemowrapper.__wrapped__ = Callable[..., Any]
+
+boundedmemowrapper = Callable[..., Any]
+boundedmemowrapper.cache_info = Callable[[], CacheInfo]
+boundedmemowrapper.cache_stats = Callable[[], CacheStats]
+boundedmemowrapper.cache_clear = Callable[[], None]
+boundedmemowrapper.__wrapped__ = Callable[..., Any]
+
 
 def identity(x: Any) -> Any: pass
 
@@ -45,6 +68,59 @@ def memoize(fn: Callable[..., Any], cachesize: int = 128,
             typed: bool = False) -> memowrapper: pass
 
 
+def _watched_stats(watch: Optional[Union[str, Sequence[str], Callable[..., Union[str, Sequence[str]]]]],
+                   args: Tuple[Any, ...],
+                   keywords: dict) -> Tuple[Tuple[str, int, int], ...]: pass
+
+
+def _stable_pickle(value: Any) -> bytes: pass
+
+
+def _code_identity(code: CodeType) -> Tuple[Any, ...]: pass
+
+
+def _canonical(value: Any) -> Any: pass
+
+
+def _function_identity(fn: Callable[..., Any]) -> Tuple[Any, ...]: pass
+
+
+def _locked(path: str) -> ContextManager[None]: pass
+
+
+def _cache_entries(cachedir: str) -> List[Tuple[float, int, str]]: pass
+
+
+def _evict(cachedir: str, maxbytes: int) -> int: pass
+
+
+def disk_memoize(fn: Callable[..., Any],
+                 cachedir: Optional[str] = None,
+                 maxbytes: Optional[int] = None,
+                 watch: Optional[Union[str, Sequence[str], Callable[..., Union[str, Sequence[str]]]]] = None,
+                 protocol: Optional[int] = None) -> diskmemowrapper: pass
+
+
+def _make_key(args: Tuple[Any, ...], keywords: dict, typed: bool) -> Tuple[Any, ...]: pass
+
+
+class _Flight(object):
+    done: Event
+    result: Any
+    error: Optional[BaseException]
+
+    def __init__(self) -> None: pass
+
+
+def bounded_memoize(fn: Callable[..., Any],
+                    cachesize: Optional[int] = 128,
+                    maxbytes: Optional[int] = None,
+                    ttl: Optional[float] = None,
+                    sizer: Callable[[Any], int] = ...,
+                    typed: bool = False,
+                    clock: Callable[[], float] = ...) -> boundedmemowrapper: pass
+
+
 def T(x: Optional[Any] = None) -> True: pass
 
 
@@ -1,10 +1,16 @@
 __license__ = 'MIT'
 
 __all__ = [
+    'compression',
+    'dedup',
+    'extsort',
     'formatters',
+    'lineindex',
     'pickler',
     'readers',
     'savers',
+    'snapshot',
+    'tables',
     'utility',
     'walkers',
 ]
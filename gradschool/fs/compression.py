@@ -0,0 +1,211 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.lzma': 'xz',
+}
+
+# bzip2 files start with BZh, the block size digit and the magic of a block or, when empty, of the end of stream
+MAGIC = (
+    (re.compile(b'\x1f\x8b'), 'gzip'),
+    (re.compile(b'BZh[1-9](?:1AY&SY|\x17rE8P\x90)'), 'bz2'),
+    (re.compile(b'\xfd7zXZ\x00'), 'xz'),
+)
+_MAGIC_SIZE = 10
+
+_DEFAULTS = {
+    'gzip': {'compresslevel': 6, 'buffer_size': None, 'threads': None},
+    'bz2': {'compresslevel': 9, 'buffer_size': None, 'threads': None},
+    'xz': {'compresslevel': 6, 'buffer_size': None, 'threads': None},
+}
+
+
+def set_compression_defaults(codec, compresslevel=None, buffer_size=None, threads=None):
+    """
+    Sets the defaults open_file uses for a codec, so the readers and savers in this package
+    use them without needing the values passed through.
+    :param codec: The codec, gzip, bz2 or xz
+    :param compresslevel: Optional compression level (preset for xz). Defaults are gzip 6, bz2 9 and xz 6
+    :param buffer_size: Optional size of the buffer placed in front of the (de)compressor
+    :param threads: Optional number of threads compressing blocks in parallel when writing, gzip only
+    """
+    if codec not in _DEFAULTS:
+        raise ValueError('Unknown codec %r' % codec)
+    if threads is not None and codec != 'gzip':
+        raise ValueError('Parallel compression is only supported for gzip')
+    defaults = _DEFAULTS[codec]
+    if compresslevel is not None:
+        defaults['compresslevel'] = compresslevel
+    if buffer_size is not None:
+        defaults['buffer_size'] = buffer_size
+    if threads is not None:
+        defaults['threads'] = threads
+
+
+def codec_from_extension(path):
+    """
+    :param path: Path to a file
+    :return: The codec of the file's extension, None if it is not a compressed file extension
+    """
+    return EXTENSIONS.get(os.path.splitext(os.fspath(path))[1].lower())
+
+
+def codec_from_magic(path):
+    """
+    :param path: Path to an existing file
+    :return: The codec identified by the file's magic bytes, None if it is not a compressed file
+    """
+    with open(path, 'rb') as f:
+        head = f.read(_MAGIC_SIZE)
+    for magic, codec in MAGIC:
+        if magic.match(head):
+            return codec
+    return None
+
+
+def detect_codec(path, mode='r'):
+    """
+    Detects the compression codec of a file.
+    Files being read are identified by their magic bytes, files being written by their extension
+    :param path: Path to the file
+    :param mode: The mode the file will be opened in. Defaults to r
+    :return: gzip, bz2, xz or None if the file is not compressed
+    """
+    if 'r' in mode and '+' not in mode and os.path.isfile(path):
+        return codec_from_magic(path)
+    return codec_from_extension(path)
+
+
+def is_compressed(path):
+    """
+    :param path: Path to an existing file
+    :return: True if the file is compressed
+    """
+    return detect_codec(path) is not None
+
+
+class ParallelGzipWriter(io.BufferedIOBase):
+    """
+    Writable binary stream producing a gzip file by compressing blocks of the data written on a pool of threads.
+    Each block becomes its own gzip member, which gzip, zcat and the gzip module read as one stream.
+    zlib releases the GIL while compressing, so the blocks are compressed in parallel.
+    """
+
+    def __init__(self, path, mode='wb', compresslevel=6, threads=None, block_size=1 << 20):
+        """
+        :param path: Path to the gzip file to be created
+        :param mode: The mode the file is opened in, wb or ab. Defaults to wb
+        :param compresslevel: The compression level. Defaults to 6
+        :param threads: Optional number of compressing threads. Defaults to the number of CPUs
+        :param block_size: Number of uncompressed bytes per block. Defaults to 1 MiB
+        """
+        super().__init__()
+        self.raw = open(path, mode)
+        self.compresslevel = compresslevel
+        self.block_size = block_size
+        threads = threads or os.cpu_count() or 1
+        self.max_pending = threads * 2
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.pending = deque()
+        self.buf = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('write to closed file')
+        data = memoryview(data).cast('B')
+        self.buf += data
+        while len(self.buf) >= self.block_size:
+            block = bytes(self.buf[:self.block_size])
+            del self.buf[:self.block_size]
+            self._submit(block)
+        return data.nbytes
+
+    def _submit(self, block):
+        self.pending.append(self.executor.submit(gzip.compress, block, self.compresslevel))
+        while len(self.pending) > self.max_pending:
+            self.raw.write(self.pending.popleft().result())
+
+    def flush(self):
+        """
+        Compresses the buffered data and writes every compressed block
+        """
+        if self.buf:
+            self._submit(bytes(self.buf))
+            self.buf.clear()
+        while self.pending:
+            self.raw.write(self.pending.popleft().result())
+        self.raw.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            super().close()
+        finally:
+            self.executor.shutdown()
+            self.raw.close()
+
+
+def open_file(path, mode='r', codec='auto', compresslevel=None, buffer_size=None,
+              threads=None, encoding=None, errors=None, newline=None):
+    """
+    Opens a file like open, transparently (de)compressing gzip, bz2 and xz files with the gzip, bz2 and lzma modules.
+    When reading the codec is detected from the file's magic bytes and when writing from its extension
+    (.gz, .bz2, .xz, .lzma). Uncompressed files are opened with open.
+    :param path: Path to the file
+    :param mode: The mode the file is opened in, text unless it contains b. Defaults to r
+    :param codec: Optional codec, gzip, bz2, xz or None for an uncompressed file. Defaults to auto detection
+    :param compresslevel: Optional compression level (preset for xz). Defaults to the codec's default,
+    see set_compression_defaults
+    :param buffer_size: Optional size of the buffer in front of the (de)compressor, or of the file if uncompressed
+    :param threads: Optional number of threads compressing blocks in parallel when writing gzip files,
+    see ParallelGzipWriter
+    :param encoding: Optional text encoding. Defaults to the locale's preferred encoding like open
+    :param errors: Optional text encoding error handling
+    :param newline: Optional newline handling, see open
+    :return: The file object
+    """
+    if codec == 'auto':
+        codec = detect_codec(path, mode)
+    if codec is None:
+        return open(path, mode, buffering=buffer_size or -1, encoding=encoding, errors=errors, newline=newline)
+    if codec not in _DEFAULTS:
+        raise ValueError('Unknown codec %r' % codec)
+    defaults = _DEFAULTS[codec]
+    if compresslevel is None:
+        compresslevel = defaults['compresslevel']
+    if buffer_size is None:
+        buffer_size = defaults['buffer_size']
+    if threads is None:
+        threads = defaults['threads']
+    binary = 'b' in mode
+    binmode = mode.replace('t', '') if binary else mode.replace('t', '') + 'b'
+    writing = any(c in binmode for c in 'wax')
+    if '+' in binmode:
+        raise ValueError('Compressed files can not be opened for both reading and writing')
+    if codec == 'gzip' and writing and threads:
+        stream = ParallelGzipWriter(path, mode=binmode, compresslevel=compresslevel, threads=threads)
+    elif codec == 'gzip':
+        stream = gzip.GzipFile(path, binmode, compresslevel=compresslevel)
+    elif codec == 'bz2':
+        stream = bz2.BZ2File(path, binmode, compresslevel=compresslevel)
+    else:
+        stream = lzma.LZMAFile(path, binmode, preset=compresslevel if writing else None)
+    if buffer_size:
+        stream = io.BufferedWriter(stream, buffer_size) if writing else io.BufferedReader(stream, buffer_size)
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, errors=errors, newline=newline)
@@ -0,0 +1,64 @@
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Deque, Dict, IO, Optional, Pattern, Tuple
+
+EXTENSIONS: Dict[str, str]
+MAGIC: Tuple[Tuple[Pattern[bytes], str], ...]
+_MAGIC_SIZE: int
+_DEFAULTS: Dict[str, Dict[str, Optional[int]]]
+
+
+def set_compression_defaults(codec: str,
+                             compresslevel: Optional[int] = None,
+                             buffer_size: Optional[int] = None,
+                             threads: Optional[int] = None) -> None: pass
+
+
+def codec_from_extension(path: str) -> Optional[str]: pass
+
+
+def codec_from_magic(path: str) -> Optional[str]: pass
+
+
+def detect_codec(path: str, mode: str = 'r') -> Optional[str]: pass
+
+
+def is_compressed(path: str) -> bool: pass
+
+
+class ParallelGzipWriter(io.BufferedIOBase):
+    raw: BinaryIO
+    compresslevel: int
+    block_size: int
+    max_pending: int
+    executor: ThreadPoolExecutor
+    pending: Deque[Future]
+    buf: bytearray
+
+    def __init__(self,
+                 path: str,
+                 mode: str = 'wb',
+                 compresslevel: int = 6,
+                 threads: Optional[int] = None,
+                 block_size: int = 1 << 20) -> None: pass
+
+    def writable(self) -> bool: pass
+
+    def write(self, data: Any) -> int: pass
+
+    def _submit(self, block: bytes) -> None: pass
+
+    def flush(self) -> None: pass
+
+    def close(self) -> None: pass
+
+
+def open_file(path: str,
+              mode: str = 'r',
+              codec: Optional[str] = 'auto',
+              compresslevel: Optional[int] = None,
+              buffer_size: Optional[int] = None,
+              threads: Optional[int] = None,
+              encoding: Optional[str] = None,
+              errors: Optional[str] = None,
+              newline: Optional[str] = None) -> IO[Any]: pass
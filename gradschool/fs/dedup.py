@@ -0,0 +1,138 @@
+import hashlib
+import os
+import stat
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .walkers import rlist_dir
+
+DuplicateGroup = namedtuple('DuplicateGroup', ['size', 'digest', 'paths'])
+
+
+def partial_digest(path, size, sample=4096, hashname='sha1'):
+    """
+    Hashes the first and last sample bytes of a file
+    :param path: Path to the file to hash
+    :param size: The size of the file
+    :param sample: How many bytes from the start and end of the file are hashed. Defaults to 4096
+    :param hashname: Name of the hashlib algorithm to use. Defaults to sha1
+    :return: The hex digest of the sampled bytes
+    """
+    h = hashlib.new(hashname)
+    with open(path, 'rb') as f:
+        h.update(f.read(sample))
+        if size > sample:
+            f.seek(max(size - sample, sample))
+            h.update(f.read(sample))
+    return h.hexdigest()
+
+
+def full_digest(path, blocksize=1 << 20, hashname='sha1'):
+    """
+    Hashes the entire contents of a file reading it in blocks
+    :param path: Path to the file to hash
+    :param blocksize: Number of bytes read at a time. Defaults to 1 MiB
+    :param hashname: Name of the hashlib algorithm to use. Defaults to sha1
+    :return: The hex digest of the file
+    """
+    h = hashlib.new(hashname)
+    buf = bytearray(blocksize)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def _split_by(groups, executor, digestfn, skipped=None):
+    """
+    Refines each group of candidate paths by the digest digestfn computes for them on the executor.
+    Files that can not be read are left out of the groups
+    :param groups: Iterable of (size, key, paths) candidate groups
+    :param executor: The executor the digests are computed on
+    :param digestfn: Function called with a path and its size returning its digest
+    :param skipped: Optional list the (path, error) of the files that could not be read are appended to
+    :return: List of (size, digest, paths) groups containing more than one path
+    """
+    jobs = []
+    for size, _, paths in groups:
+        jobs.append((size, [(p, executor.submit(digestfn, p, size)) for p in paths]))
+    refined = []
+    for size, futures in jobs:
+        by_digest = defaultdict(list)
+        for p, future in futures:
+            try:
+                by_digest[future.result()].append(p)
+            except OSError as error:
+                # removed or made unreadable since the walk
+                if skipped is not None:
+                    skipped.append((p, error))
+        for digest, paths in by_digest.items():
+            if len(paths) > 1:
+                refined.append((size, digest, paths))
+    return refined
+
+
+def find_duplicates(dirpath='.', ffilter=None, dfilter=None, min_size=1,
+                    sample=4096, hashname='sha1', workers=4, skipped=None, **walk_kwargs):
+    """
+    Finds the files with duplicate contents in a directory tree walked using walkers.rlist_dir.
+    Candidates are narrowed in stages, only files with the same size have their first and last sample
+    bytes hashed and only the files whose partial hashes collide are hashed in full.
+    Hashing is done on a pool of worker threads. Hard links to the same file are only counted once.
+    Files removed or made unreadable during the run are skipped rather than ending it.
+    :param dirpath: Path to the directory to search. Defaults to current working directory
+    :param ffilter: Optional file filtering function, see walkers.rlist_dir
+    :param dfilter: Optional directory filtering function, see walkers.rlist_dir
+    :param min_size: Files smaller than this number of bytes are ignored. Defaults to 1, skipping empty files
+    :param sample: How many bytes from the start and end of a file are used for the partial hash. Defaults to 4096
+    :param hashname: Name of the hashlib algorithm to use. Defaults to sha1
+    :param workers: Number of threads hashing files. Defaults to 4
+    :param skipped: Optional list the (path, error) of the skipped files are appended to
+    :param walk_kwargs: Additional keyword arguments for walkers.rlist_dir, i.e. include, exclude, skip_hidden
+    :return: List of DuplicateGroup sorted by the number of bytes reclaimable, largest first
+    """
+    by_size = defaultdict(list)
+    seen = set()
+    for p in rlist_dir(dirpath, ffilter=ffilter, dfilter=dfilter, **walk_kwargs):
+        try:
+            st = os.stat(p, follow_symlinks=False)
+        except OSError as error:
+            if skipped is not None:
+                skipped.append((p, error))
+            continue
+        if not stat.S_ISREG(st.st_mode) or st.st_size < min_size:
+            continue
+        ident = (st.st_dev, st.st_ino)
+        if ident in seen:
+            continue
+        seen.add(ident)
+        by_size[st.st_size].append(p)
+    candidates = [(size, None, paths) for size, paths in by_size.items() if len(paths) > 1]
+    by_size.clear()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        candidates = _split_by(
+            candidates, executor,
+            lambda p, size: partial_digest(p, size, sample=sample, hashname=hashname), skipped)
+        small = [c for c in candidates if c[0] <= sample * 2]
+        large = [c for c in candidates if c[0] > sample * 2]
+        # the partial hash already covered the whole contents of the small files
+        found = small + _split_by(
+            large, executor, lambda p, size: full_digest(p, hashname=hashname), skipped)
+    groups = [DuplicateGroup(size, digest, paths) for size, digest, paths in found]
+    groups.sort(key=reclaimable_bytes, reverse=True)
+    return groups
+
+
+def reclaimable_bytes(groups):
+    """
+    Computes the number of bytes that could be reclaimed by keeping a single copy of each duplicate
+    :param groups: A DuplicateGroup or an iterable of DuplicateGroup
+    :return: The number of reclaimable bytes
+    """
+    if isinstance(groups, DuplicateGroup):
+        return groups.size * (len(groups.paths) - 1)
+    return sum(g.size * (len(g.paths) - 1) for g in groups)
@@ -0,0 +1,31 @@
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+DuplicateGroup = NamedTuple('DuplicateGroup', [('size', int), ('digest', str), ('paths', List[Path])])
+
+
+def partial_digest(path: Union[str, Path], size: int, sample: int = 4096, hashname: str = 'sha1') -> str: pass
+
+
+def full_digest(path: Union[str, Path], blocksize: int = 1 << 20, hashname: str = 'sha1') -> str: pass
+
+
+def _split_by(groups: Iterable[Tuple[int, Optional[str], List[Path]]],
+              executor: Executor,
+              digestfn: Callable[[Path, int], str],
+              skipped: Optional[List[Tuple[Path, OSError]]] = None) -> List[Tuple[int, str, List[Path]]]: pass
+
+
+def find_duplicates(dirpath: str = '.',
+                    ffilter: Optional[Callable[[Path], bool]] = None,
+                    dfilter: Optional[Callable[[Path], bool]] = None,
+                    min_size: int = 1,
+                    sample: int = 4096,
+                    hashname: str = 'sha1',
+                    workers: int = 4,
+                    skipped: Optional[List[Tuple[Path, OSError]]] = None,
+                    **walk_kwargs: Any) -> List[DuplicateGroup]: pass
+
+
+def reclaimable_bytes(groups: Union[DuplicateGroup, Iterable[DuplicateGroup]]) -> int: pass
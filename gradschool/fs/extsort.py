@@ -0,0 +1,165 @@
+import heapq
+import os
+import sys
+import tempfile
+from contextlib import ExitStack
+from itertools import islice
+
+from .compression import codec_from_extension, open_file
+
+DEFAULT_MEMORY_LIMIT = 64 << 20
+DEFAULT_MAX_FANOUT = 128
+
+
+def _open_run(path, mode):
+    return open(path, mode, encoding='utf-8', errors='surrogateescape', newline='\n')
+
+
+def _unique(lines, key=None):
+    """
+    :return: Generator yielding the sorted lines skipping those equal to the line before them,
+    compared by key when supplied
+    """
+    prev = missing = object()
+    if key is None:
+        for line in lines:
+            if line != prev:
+                prev = line
+                yield line
+    else:
+        for line in lines:
+            k = key(line)
+            if prev is missing or k != prev:
+                prev = k
+                yield line
+
+
+def _write_run(lines, tmpdir=None, batch=4096):
+    """
+    Writes sorted lines to a new temporary run file, one per line
+    :return: Path to the run file
+    """
+    fd, path = tempfile.mkstemp(prefix='gs-extsort-', suffix='.run', dir=tmpdir)
+    try:
+        with _open_run(fd, 'w') as out:
+            lines = iter(lines)
+            while True:
+                chunk = list(islice(lines, batch))
+                if not chunk:
+                    break
+                out.write('\n'.join(chunk))
+                out.write('\n')
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _remove_runs(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _merge_runs(paths, key=None, unique=False):
+    """
+    :return: Generator k-way merging the lines of the sorted run files, keeping only one open file per run
+    """
+    with ExitStack() as stack:
+        files = [stack.enter_context(_open_run(p, 'r')) for p in paths]
+        merged = heapq.merge(*[(line[:-1] for line in f) for f in files], key=key)
+        yield from (_unique(merged, key) if unique else merged)
+
+
+def external_sort(lines, memory_limit=DEFAULT_MEMORY_LIMIT, key=None, unique=False,
+                  tmpdir=None, max_fanout=DEFAULT_MAX_FANOUT):
+    """
+    Sorts lines that do not fit in memory.
+    Lines are collected until their estimated size reaches memory_limit, sorted and spilled to a temporary
+    run file. The runs are then k-way merged with heapq.merge, in several passes if there are more than
+    max_fanout of them, so only one line per run is held in memory while the sorted lines are yielded.
+    If all the lines fit within memory_limit they are sorted in memory and nothing is written to disk.
+    A trailing newline is removed from each line, lines must not otherwise contain newlines.
+    The run files are removed once the generator is exhausted or closed
+    :param lines: Iterable of the lines to be sorted, i.e. a file object
+    :param memory_limit: Approximate number of bytes of lines held in memory at once. Defaults to 64 MiB
+    :param key: Optional key function, like sorted's
+    :param unique: Optional boolean flag indicating only the first of the lines comparing equal,
+    by key when supplied, is yielded. Defaults to False
+    :param tmpdir: Optional directory the run files are written to. Defaults to tempfile's default directory
+    :param max_fanout: Maximum number of runs merged at once. Defaults to 128
+    :return: Generator yielding the sorted lines, without their newlines
+    """
+    if max_fanout < 2:
+        raise ValueError('max_fanout must be at least 2')
+    runs = []
+    try:
+        buf = []
+        used = 0
+        for line in lines:
+            if line.endswith('\n'):
+                line = line[:-1]
+            buf.append(line)
+            # the string plus its slot in the list
+            used += sys.getsizeof(line) + 8
+            if used >= memory_limit:
+                buf.sort(key=key)
+                runs.append(_write_run(_unique(buf, key) if unique else buf, tmpdir))
+                buf = []
+                used = 0
+        buf.sort(key=key)
+        if not runs:
+            yield from (_unique(buf, key) if unique else buf)
+            return
+        if buf:
+            runs.append(_write_run(_unique(buf, key) if unique else buf, tmpdir))
+        buf = None
+        while len(runs) > max_fanout:
+            merged = []
+            try:
+                for i in range(0, len(runs), max_fanout):
+                    merged.append(_write_run(_merge_runs(runs[i:i + max_fanout], key, unique), tmpdir))
+            finally:
+                _remove_runs(runs)
+                runs = merged
+        yield from _merge_runs(runs, key, unique)
+    finally:
+        _remove_runs(runs)
+
+
+def sort_file(filep, saveto=None, mapfn=None, memory_limit=DEFAULT_MEMORY_LIMIT, key=None,
+              unique=False, tmpdir=None, max_fanout=DEFAULT_MAX_FANOUT):
+    """
+    Sorts the lines of a file that does not fit in memory using external_sort, writing them straight to saveto.
+    The sorted lines are written to a temporary file next to saveto which then replaces it,
+    so saveto may be filep
+    :param filep: Path to the file to be sorted
+    :param saveto: Optional path to the file the sorted lines are saved to. Defaults to filep
+    :param mapfn: Optional string returning function applied to each line before sorting
+    :param memory_limit: Approximate number of bytes of lines held in memory at once. Defaults to 64 MiB
+    :param key: Optional key function, like sorted's
+    :param unique: Optional boolean flag indicating duplicate lines are dropped. Defaults to False
+    :param tmpdir: Optional directory the run files are written to. Defaults to tempfile's default directory
+    :param max_fanout: Maximum number of runs merged at once. Defaults to 128
+    :return: The number of lines written
+    """
+    if filep is None:
+        raise ValueError('Must supply a path to the file to be sorted')
+    saveto = saveto if saveto is not None else filep
+    tmp = '%s.tmp' % saveto
+    count = 0
+    try:
+        with open_file(filep, 'r') as f:
+            lines = external_sort(f if mapfn is None else map(mapfn, f), memory_limit=memory_limit, key=key,
+                                  unique=unique, tmpdir=tmpdir, max_fanout=max_fanout)
+            with open_file(tmp, 'w', codec=codec_from_extension(saveto)) as out:
+                for line in lines:
+                    out.write('%s\n' % line)
+                    count += 1
+        os.replace(tmp, saveto)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
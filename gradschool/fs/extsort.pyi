@@ -0,0 +1,39 @@
+from typing import Any, Callable, Generator, IO, Iterable, List, Optional, Union
+
+DEFAULT_MEMORY_LIMIT: int
+DEFAULT_MAX_FANOUT: int
+
+
+def _open_run(path: Union[str, int], mode: str) -> IO[str]: pass
+
+
+def _unique(lines: Iterable[str], key: Optional[Callable[[str], Any]] = None) -> Generator[str]: pass
+
+
+def _write_run(lines: Iterable[str], tmpdir: Optional[str] = None, batch: int = 4096) -> str: pass
+
+
+def _remove_runs(paths: Iterable[str]) -> None: pass
+
+
+def _merge_runs(paths: List[str],
+                key: Optional[Callable[[str], Any]] = None,
+                unique: bool = False) -> Generator[str]: pass
+
+
+def external_sort(lines: Iterable[str],
+                  memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                  key: Optional[Callable[[str], Any]] = None,
+                  unique: bool = False,
+                  tmpdir: Optional[str] = None,
+                  max_fanout: int = DEFAULT_MAX_FANOUT) -> Generator[str]: pass
+
+
+def sort_file(filep: str,
+              saveto: Optional[str] = None,
+              mapfn: Optional[Callable[[str], str]] = None,
+              memory_limit: int = DEFAULT_MEMORY_LIMIT,
+              key: Optional[Callable[[str], Any]] = None,
+              unique: bool = False,
+              tmpdir: Optional[str] = None,
+              max_fanout: int = DEFAULT_MAX_FANOUT) -> int: pass
@@ -1,3 +1,6 @@
+from itertools import islice
+
+
 def default_formatter(item):
     """
     Default formatter (%s)
@@ -20,9 +23,13 @@ def formatter_str(formatstr):
     """
     Creates a formatter function from format string, i.e. '%s, %s' etc
     :param formatstr: The formatting string
-    :return: Formatter function using formatstr
+    :return: Formatter function using formatstr. The format string is available as its formatstr attribute
+    which format_batch uses to format items without calling the function
     """
-    return lambda item: formatstr % item
+    def formatter(item):
+        return formatstr % item
+    formatter.formatstr = formatstr
+    return formatter
 
 
 def custom_formatter(selector, formatstr):
@@ -48,3 +55,60 @@ def format_output(tosave, formatter):
     if not formatted.endswith('\n'):
         formatted = formatted + '\n'
     return formatted
+
+
+_BATCH_TEMPLATES = {default_formatter: '%s\n', int_formatter: '%d\n'}
+
+
+def _has_tuples(items):
+    """
+    :return: True if any of the items is a tuple, which % would unpack as several arguments
+    """
+    return any(issubclass(t, tuple) for t in set(map(type, items)))
+
+
+def format_batch(items, formatter=default_formatter):
+    """
+    Formats a batch of items into one string, equivalent to joining format_output applied to each item.
+    default_formatter and int_formatter format the whole batch with a single % operation and
+    the formatters created by formatter_str apply their format string without a function call per item
+    :param items: List of the items to be formatted
+    :param formatter: The formatter function applied to each item. Defaults to default_formatter
+    :return: The formatted items joined into one string
+    """
+    template = _BATCH_TEMPLATES.get(formatter)
+    if template is not None and not _has_tuples(items):
+        return template * len(items) % tuple(items)
+    formatstr = getattr(formatter, 'formatstr', None)
+    if formatstr is not None:
+        parts = list(map(formatstr.__mod__, items))
+        if formatstr.endswith('\n'):
+            return ''.join(parts)
+    else:
+        parts = list(map(formatter, items))
+    return ''.join([part if part[-1:] == '\n' else part + '\n' for part in parts])
+
+
+def write_formatted(out, items, formatter=default_formatter, batch_size=4096):
+    """
+    Writes the formatted items to out, formatting and writing batch_size items at a time using format_batch
+    :param out: The object written to, i.e. a file object
+    :param items: Iterable of the items to be written
+    :param formatter: The formatter function applied to each item. Defaults to default_formatter
+    :param batch_size: Number of items formatted and written at a time. Defaults to 4096
+    :return: The number of items written
+    """
+    count = 0
+    if isinstance(items, (list, tuple)):
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            out.write(format_batch(batch, formatter))
+            count += len(batch)
+        return count
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return count
+        out.write(format_batch(batch, formatter))
+        count += len(batch)
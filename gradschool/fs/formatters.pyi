@@ -1,4 +1,4 @@
-from typing import Callable, Any
+from typing import Any, Callable, Dict, Iterable, List, Sequence
 
 
 def default_formatter(item: Any) -> str: pass
@@ -14,3 +14,18 @@ def custom_formatter(selector: Callable[..., str], formatstr: str) -> Callable[.
 
 
 def format_output(tosave: Any, formatter: Callable[..., str]) -> str: pass
+
+
+_BATCH_TEMPLATES: Dict[Callable[..., str], str]
+
+
+def _has_tuples(items: Sequence[Any]) -> bool: pass
+
+
+def format_batch(items: Sequence[Any], formatter: Callable[..., str] = default_formatter) -> str: pass
+
+
+def write_formatted(out: Any,
+                    items: Iterable[Any],
+                    formatter: Callable[..., str] = default_formatter,
+                    batch_size: int = 4096) -> int: pass
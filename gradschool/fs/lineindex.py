@@ -0,0 +1,271 @@
+import locale
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from .compression import is_compressed
+
+_MAGIC = b'GSLIDX1\x00'
+# magic, size and mtime_ns of the indexed file, lines per offset, number of lines
+_HEADER = struct.Struct('<8sQqQQ')
+
+
+def _scan_offsets(f, every, blocksize=1 << 20, chunk=4096):
+    """
+    Scans a binary file recording the byte offset of every every-th line
+    :param f: The file opened in binary mode, positioned at its start
+    :param every: Number of lines between recorded offsets
+    :param blocksize: Number of bytes read at a time. Defaults to 1 MiB
+    :param chunk: Newlines are counted chunk bytes at a time and only the chunks containing a recorded
+    line are searched newline by newline. Defaults to 4096
+    :return: Tuple of the offsets array and the number of lines in the file
+    """
+    offsets = array('Q', [0])
+    lines = 0
+    mark = every
+    pos = 0
+    last = b'\n'
+    while True:
+        block = f.read(blocksize)
+        if not block:
+            break
+        start = 0
+        end = len(block)
+        while start < end:
+            stop = min(start + chunk, end)
+            n = block.count(b'\n', start, stop)
+            if lines + n < mark:
+                lines += n
+                start = stop
+                continue
+            while lines < mark:
+                start = block.find(b'\n', start, stop) + 1
+                lines += 1
+            offsets.append(pos + start)
+            mark += every
+        pos += end
+        last = block[-1:]
+    if last != b'\n':
+        # the last line has no newline
+        lines += 1
+    # an offset recorded at the end of the file does not start a line
+    del offsets[max((lines - 1) // every + 1, 1):]
+    return offsets, lines
+
+
+class LineIndex(object):
+    """
+    Index of the byte offsets of every every-th line of a text file, for random access by line number.
+    The index is saved to a sidecar file next to the indexed file (filep.lidx by default) and reused while
+    the size and mtime of the file are unchanged, otherwise it is rebuilt.
+    Reading any range of lines then costs a single seek plus reading at most every - 1 lines to skip.
+    Lines are split on \\n, so the file must use an ASCII compatible encoding, i.e. utf-8.
+    Compressed files can not be indexed.
+
+    Example:
+        idx = LineIndex('urls.txt')
+        print(len(idx), idx[1000000])
+        for line in idx.get_lines(5000, 5010):
+            print(line)
+    """
+
+    def __init__(self, filep, every=1000, indexp=None, encoding=None, binary=False, save=True):
+        """
+        :param filep: Path to the text file to be indexed
+        :param every: Number of lines between indexed offsets. Defaults to 1000
+        :param indexp: Optional path to the index file. Defaults to filep.lidx
+        :param encoding: Optional text encoding of the file. Defaults to the locale's preferred encoding like open
+        :param binary: Optional boolean flag indicating lines are returned as bytes. Defaults to False
+        :param save: Optional boolean flag indicating the index is saved to the index file
+        when it is built. Defaults to True
+        """
+        if filep is None:
+            raise ValueError('Must supply a path to the file to be indexed')
+        if every < 1:
+            raise ValueError('every must be at least 1')
+        self.filep = os.fspath(filep)
+        if is_compressed(self.filep):
+            raise ValueError('Can not index a compressed file')
+        self.indexp = os.fspath(indexp) if indexp is not None else '%s.lidx' % self.filep
+        self.every = every
+        self.encoding = encoding if encoding is not None else locale.getpreferredencoding(False)
+        self.binary = binary
+        self.save_index = save
+        self.size = None
+        self.mtime_ns = None
+        self.lines = 0
+        self.offsets = array('Q')
+        if not self.load():
+            self.build()
+
+    def is_stale(self):
+        """
+        :return: True if the size or mtime of the indexed file changed since it was indexed
+        """
+        st = os.stat(self.filep)
+        return st.st_size != self.size or st.st_mtime_ns != self.mtime_ns
+
+    def load(self):
+        """
+        Loads the index file if it exists, indexes the file with the same every and is not stale
+        :return: True if the index was loaded
+        """
+        try:
+            with open(self.indexp, 'rb') as f:
+                header = f.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return False
+                magic, size, mtime_ns, every, lines = _HEADER.unpack(header)
+                if magic != _MAGIC or every != self.every:
+                    return False
+                st = os.stat(self.filep)
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    return False
+                offsets = array('Q')
+                count = max((lines - 1) // every + 1, 1)
+                offsets.fromfile(f, count)
+        except (FileNotFoundError, EOFError):
+            return False
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        self.size, self.mtime_ns, self.lines, self.offsets = size, mtime_ns, lines, offsets
+        return True
+
+    def build(self):
+        """
+        Scans the file building the index, saving it to the index file unless save is False
+        """
+        with open(self.filep, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self.offsets, self.lines = _scan_offsets(f, self.every)
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        if self.save_index:
+            self.save()
+
+    def save(self):
+        """
+        Saves the index to the index file
+        """
+        tmp = '%s.tmp' % self.indexp
+        offsets = self.offsets
+        if sys.byteorder == 'big':
+            offsets = array('Q', offsets)
+            offsets.byteswap()
+        with open(tmp, 'wb') as out:
+            out.write(_HEADER.pack(_MAGIC, self.size, self.mtime_ns, self.every, self.lines))
+            offsets.tofile(out)
+        os.replace(tmp, self.indexp)
+
+    def refresh(self):
+        """
+        Rebuilds the index if the file changed since it was indexed
+        :return: True if the index was rebuilt
+        """
+        if self.is_stale():
+            self.build()
+            return True
+        return False
+
+    def line_offset(self, n):
+        """
+        :param n: Line number, starting at 0
+        :return: Tuple of the byte offset of the closest indexed line at or before line n
+        and the number of lines between them
+        """
+        if n < 0 or n >= self.lines:
+            raise IndexError('line %d out of range, the file has %d lines' % (n, self.lines))
+        return self.offsets[n // self.every], n % self.every
+
+    def get_lines(self, start, stop=None):
+        """
+        Reads a range of lines, like slicing the list of the file's lines. The index is rebuilt first
+        if the file changed
+        :param start: Number of the first line, starting at 0
+        :param stop: Optional number of the line the range ends at (exclusive). Defaults to the end of the file
+        :return: List of the lines, including their newlines
+        """
+        self.refresh()
+        stop = self.lines if stop is None else min(stop, self.lines)
+        if start < 0 or start >= stop:
+            return []
+        offset, skip = self.line_offset(start)
+        with open(self.filep, 'rb') as f:
+            f.seek(offset)
+            lines = list(islice(f, skip, skip + stop - start))
+        if self.binary:
+            return lines
+        return [line.decode(self.encoding) for line in lines]
+
+    def __len__(self):
+        return self.lines
+
+    def __getitem__(self, n):
+        self.refresh()
+        if isinstance(n, slice):
+            if n.step not in (None, 1):
+                raise ValueError('Only contiguous ranges of lines can be read')
+            start, stop, _ = n.indices(self.lines)
+            return self.get_lines(start, stop)
+        if n < 0:
+            n += self.lines
+        lines = self.get_lines(n, n + 1)
+        if not lines:
+            raise IndexError('line %d out of range, the file has %d lines' % (n, self.lines))
+        return lines[0]
+
+    def line_ranges(self, parts):
+        """
+        Splits the lines of the file into ranges of roughly equal line counts,
+        starting at indexed lines so each is reached with a single seek
+        :param parts: Number of ranges
+        :return: List of (start, stop) line numbers
+        """
+        self.refresh()
+        blocks = len(self.offsets) if self.lines else 0
+        parts = max(min(parts, blocks), 1)
+        bounds = [min(blocks * i // parts * self.every, self.lines) for i in range(parts + 1)]
+        bounds[-1] = self.lines
+        return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+    def split(self, parts):
+        """
+        Splits the file into byte ranges of roughly equal line counts, each starting at the beginning of a line,
+        i.e. for readers.read_jsonl
+        :param parts: Number of ranges
+        :return: List of (start, end) byte offsets
+        """
+        ranges = []
+        for start, stop in self.line_ranges(parts):
+            end = self.offsets[stop // self.every] if stop < self.lines else self.size
+            ranges.append((self.offsets[start // self.every], end))
+        return ranges
+
+
+def build_line_index(filep, every=1000, indexp=None):
+    """
+    Builds, or loads if it is up to date, the line index of a text file saving it to its index file.
+    Function version of lineindex.LineIndex
+    :param filep: Path to the text file to be indexed
+    :param every: Number of lines between indexed offsets. Defaults to 1000
+    :param indexp: Optional path to the index file. Defaults to filep.lidx
+    :return: The LineIndex
+    """
+    return LineIndex(filep, every=every, indexp=indexp)
+
+
+def read_lines(filep, start, stop=None, every=1000, indexp=None, encoding=None, binary=False):
+    """
+    Reads a range of lines from a text file using its line index, which is built if missing or out of date
+    :param filep: Path to the text file
+    :param start: Number of the first line, starting at 0
+    :param stop: Optional number of the line the range ends at (exclusive). Defaults to the end of the file
+    :param every: Number of lines between indexed offsets. Defaults to 1000
+    :param indexp: Optional path to the index file. Defaults to filep.lidx
+    :param encoding: Optional text encoding of the file. Defaults to the locale's preferred encoding like open
+    :param binary: Optional boolean flag indicating lines are returned as bytes. Defaults to False
+    :return: List of the lines, including their newlines
+    """
+    return LineIndex(filep, every=every, indexp=indexp, encoding=encoding, binary=binary).get_lines(start, stop)
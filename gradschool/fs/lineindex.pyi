@@ -0,0 +1,64 @@
+from array import array
+from struct import Struct
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+_MAGIC: bytes
+_HEADER: Struct
+
+
+def _scan_offsets(f: BinaryIO, every: int, blocksize: int = 1 << 20, chunk: int = 4096) -> Tuple[array, int]: pass
+
+
+class LineIndex(object):
+    filep: str
+    indexp: str
+    every: int
+    encoding: str
+    binary: bool
+    save_index: bool
+    size: Optional[int]
+    mtime_ns: Optional[int]
+    lines: int
+    offsets: array
+
+    def __init__(self,
+                 filep: str,
+                 every: int = 1000,
+                 indexp: Optional[str] = None,
+                 encoding: Optional[str] = None,
+                 binary: bool = False,
+                 save: bool = True) -> None: pass
+
+    def is_stale(self) -> bool: pass
+
+    def load(self) -> bool: pass
+
+    def build(self) -> None: pass
+
+    def save(self) -> None: pass
+
+    def refresh(self) -> bool: pass
+
+    def line_offset(self, n: int) -> Tuple[int, int]: pass
+
+    def get_lines(self, start: int, stop: Optional[int] = None) -> List[Union[str, bytes]]: pass
+
+    def __len__(self) -> int: pass
+
+    def __getitem__(self, n: Union[int, slice]) -> Union[str, bytes, List[Union[str, bytes]]]: pass
+
+    def line_ranges(self, parts: int) -> List[Tuple[int, int]]: pass
+
+    def split(self, parts: int) -> List[Tuple[int, int]]: pass
+
+
+def build_line_index(filep: str, every: int = 1000, indexp: Optional[str] = None) -> LineIndex: pass
+
+
+def read_lines(filep: str,
+               start: int,
+               stop: Optional[int] = None,
+               every: int = 1000,
+               indexp: Optional[str] = None,
+               encoding: Optional[str] = None,
+               binary: bool = False) -> List[Union[str, bytes]]: pass
@@ -1,21 +1,476 @@
+import io
+import mmap
+import os
 import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_right
 
+_BUFFERS_MAGIC = b'GSPKBUF1'
+# magic, number of buffers
+_BUFFERS_HEADER = struct.Struct('<8sQ')
+# offset and length of each buffer
+_BUFFER_ENTRY = struct.Struct('<QQ')
+# buffers start on 64 byte boundaries, enough for any numpy dtype and SIMD loads
+_BUFFER_ALIGNMENT = 64
 
-def dump_pickle(obj, file):
+
+def buffers_path(file):
+    """
+    :param file: Path to the pickle file
+    :return: Path to the sidecar file holding its out-of-band buffers
+    """
+    return '%s.buffers' % file
+
+
+def _is_buffers_file(path):
+    """
+    :return: True if the file exists and starts with the magic of a sidecar written by dump_pickle
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(_BUFFERS_MAGIC)) == _BUFFERS_MAGIC
+    except (FileNotFoundError, IsADirectoryError):
+        return False
+
+
+def _aligned(offset):
+    return -(-offset // _BUFFER_ALIGNMENT) * _BUFFER_ALIGNMENT
+
+
+def _write_buffers(path, buffers):
+    """
+    Writes the out-of-band buffers to the sidecar file, each aligned to 64 bytes
+    """
+    offset = _aligned(_BUFFERS_HEADER.size + _BUFFER_ENTRY.size * len(buffers))
+    entries = []
+    for buf in buffers:
+        entries.append((offset, buf.nbytes))
+        offset = _aligned(offset + buf.nbytes)
+    with open(path, 'wb') as out:
+        out.write(_BUFFERS_HEADER.pack(_BUFFERS_MAGIC, len(buffers)))
+        for entry in entries:
+            out.write(_BUFFER_ENTRY.pack(*entry))
+        for (start, _), buf in zip(entries, buffers):
+            out.seek(start)
+            out.write(buf)
+
+
+def _read_buffers(path, use_mmap=True, writable=True):
+    """
+    Reads the out-of-band buffers from the sidecar file
+    :param path: Path to the sidecar file
+    :param use_mmap: Optional boolean flag indicating the buffers are slices of a memory mapping
+    of the file rather than read into memory. Defaults to True
+    :param writable: Optional boolean flag indicating the memory mapping is copy on write rather
+    than read only. Defaults to True
+    :return: List of the buffers
+    """
+    with open(path, 'rb') as f:
+        magic, count = _BUFFERS_HEADER.unpack(f.read(_BUFFERS_HEADER.size))
+        if magic != _BUFFERS_MAGIC:
+            raise ValueError('%s is not a pickle buffers file' % path)
+        entries = [_BUFFER_ENTRY.unpack(f.read(_BUFFER_ENTRY.size)) for _ in range(count)]
+        if not use_mmap:
+            buffers = []
+            for offset, length in entries:
+                buf = bytearray(length)
+                f.seek(offset)
+                f.readinto(buf)
+                buffers.append(buf)
+            return buffers
+        if not entries:
+            return []
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+    # the slices keep the mapping open for as long as the objects using them
+    view = memoryview(mm)
+    return [view[offset:offset + length] for offset, length in entries]
+
+
+def dump_pickle(obj, file, protocol=None, out_of_band=False, min_buffer_size=1 << 16, buffer_size=None):
     """
-    Serialize a python object/class using pickle
+    Serialize a python object/class using pickle.
+    With out_of_band the object is pickled using protocol 5 and the large buffers it exposes through
+    pickle.PickleBuffer, i.e. numpy arrays, are written as is to a sidecar file (see buffers_path)
+    rather than copied into the pickle stream, so read_pickle can memory map them back
     :param obj: The python object/class to pickle
     :param file: Path to file to be saved
+    :param protocol: Optional pickle protocol. Defaults to pickle.DEFAULT_PROTOCOL, or 5 with out_of_band
+    :param out_of_band: Optional boolean flag indicating large buffers are saved out-of-band. Defaults to False
+    :param min_buffer_size: Buffers smaller than this number of bytes are kept in the pickle stream. Defaults to 64 KiB
+    :param buffer_size: Optional size of the write buffer of the file
     """
-    with open(file, 'wb') as out:
-        pickle.dump(obj, out)
+    if out_of_band:
+        if protocol is None:
+            protocol = 5
+        if protocol < 5:
+            raise ValueError('Out-of-band buffers require pickle protocol 5 or higher')
+    sidecar = buffers_path(file)
+    with open(file, 'wb', buffering=buffer_size or -1) as out:
+        if not out_of_band:
+            pickle.dump(obj, out, protocol=protocol)
+        else:
+            buffers = []
+
+            def keep_large(buf):
+                try:
+                    raw = buf.raw()
+                except BufferError:
+                    # not contiguous, serialized in-band
+                    return True
+                if raw.nbytes < min_buffer_size:
+                    return True
+                buffers.append(raw)
+                return False
+
+            pickle.dump(obj, out, protocol=protocol, buffer_callback=keep_large)
+    if out_of_band:
+        _write_buffers(sidecar, buffers)
+    elif _is_buffers_file(sidecar):
+        # stale buffers of an earlier out-of-band dump, any other file is left alone
+        os.remove(sidecar)
 
 
-def read_pickle(name):
+def read_pickle(name, use_mmap=True, writable=True, buffer_size=None):
     """
-    Reads a pickle file
+    Reads a pickle file. If the file was dumped with out-of-band buffers they are read from its sidecar file,
+    by default memory mapped so objects such as numpy arrays are backed by the mapping instead of copies
     :param name: Path to the pickled file to read
+    :param use_mmap: Optional boolean flag indicating out-of-band buffers are memory mapped. Defaults to True
+    :param writable: Optional boolean flag indicating the memory mapped buffers are copy on write,
+    otherwise they are read only. Defaults to True
+    :param buffer_size: Optional size of the read buffer of the file
     :return: The deserialized pickled file
     """
-    with open(name, "rb") as input_file:
-        return pickle.load(input_file)
+    sidecar = buffers_path(name)
+    buffers = _read_buffers(sidecar, use_mmap=use_mmap, writable=writable) if _is_buffers_file(sidecar) else None
+    with open(name, "rb", buffering=buffer_size or -1) as input_file:
+        if buffers is None:
+            return pickle.load(input_file)
+        return pickle.load(input_file, buffers=buffers)
+
+
+_STREAM_MAGIC = b'GSPKSTR1'
+# payload bytes and number of records of a frame
+_FRAME_HEADER = struct.Struct('<QI')
+_INDEX_MAGIC = b'GSPKIDX1'
+# magic, size and mtime_ns of the indexed stream, number of frames, number of records
+_INDEX_HEADER = struct.Struct('<8sQqQQ')
+
+
+def index_path(file):
+    """
+    :param file: Path to the pickle stream file
+    :return: Path to the sidecar file holding its frame index
+    """
+    return '%s.idx' % file
+
+
+def _scan_frames(f, size):
+    """
+    Scans the frame headers of a pickle stream, seeking over their payloads
+    :param f: The stream file opened in binary mode
+    :param size: The size of the file
+    :return: Tuple of the offsets array of the complete frames, the array of the number of the first record
+    of each frame, the total number of records and the offset the complete frames end at
+    """
+    offsets = array('Q')
+    firsts = array('Q')
+    records = 0
+    pos = len(_STREAM_MAGIC)
+    while pos + _FRAME_HEADER.size <= size:
+        f.seek(pos)
+        nbytes, count = _FRAME_HEADER.unpack(f.read(_FRAME_HEADER.size))
+        end = pos + _FRAME_HEADER.size + nbytes
+        if end > size:
+            # a frame cut short by a crash while it was being written
+            break
+        offsets.append(pos)
+        firsts.append(records)
+        records += count
+        pos = end
+    return offsets, firsts, records, pos
+
+
+def _load_frame_index(file, st):
+    """
+    :param st: The os.stat_result of the stream
+    :return: The frame index saved in the sidecar file of the stream, None if missing or if the size or mtime
+    of the stream changed since it was indexed
+    """
+    try:
+        with open(index_path(file), 'rb') as f:
+            magic, size, mtime_ns, frames, records = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+            if magic != _INDEX_MAGIC or size != st.st_size or mtime_ns != st.st_mtime_ns:
+                return None
+            offsets = array('Q')
+            firsts = array('Q')
+            offsets.fromfile(f, frames)
+            firsts.fromfile(f, frames)
+    except (FileNotFoundError, EOFError, struct.error):
+        return None
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+        firsts.byteswap()
+    return offsets, firsts, records, size
+
+
+def _save_frame_index(file, offsets, firsts, records, st):
+    tmp = '%s.tmp' % index_path(file)
+    if sys.byteorder == 'big':
+        offsets, firsts = array('Q', offsets), array('Q', firsts)
+        offsets.byteswap()
+        firsts.byteswap()
+    with open(tmp, 'wb') as out:
+        out.write(_INDEX_HEADER.pack(_INDEX_MAGIC, st.st_size, st.st_mtime_ns, len(offsets), records))
+        offsets.tofile(out)
+        firsts.tofile(out)
+    os.replace(tmp, index_path(file))
+
+
+class PickleWriter(object):
+    """
+    Utility context class for pickling records one by one into an append friendly stream file.
+    Records are pickled independently into frames of about frame_size bytes, each frame is written with
+    a header holding its size and number of records, so a crash only loses the frame being written.
+    When index is True the offset and first record of every frame are saved to a sidecar file
+    (see index_path) used by PickleReader to seek to a record.
+
+    Example:
+        with PickleWriter('records.pkls') as out:
+            for record in crawl():
+                out.write(record)
+    """
+
+    def __init__(self, file, protocol=None, frame_size=1 << 16, index=True, append=False, buffer_size=None):
+        """
+        :param file: Path to the stream file
+        :param protocol: Optional pickle protocol. Defaults to pickle.DEFAULT_PROTOCOL
+        :param frame_size: Number of pickled bytes after which a frame is written. Defaults to 64 KiB
+        :param index: Optional boolean flag indicating the frame index is saved, otherwise an existing one is removed.
+        Defaults to True
+        :param append: Optional boolean flag indicating records are appended to an existing stream. Defaults to False
+        :param buffer_size: Optional size of the write buffer of the file
+        """
+        if file is None:
+            raise ValueError('Must supply a path to the pickle stream file')
+        self.file = file
+        self.frame_size = frame_size
+        self.index = index
+        self.offsets = array('Q')
+        self.firsts = array('Q')
+        self.count = 0
+        if append and os.path.exists(file) and os.path.getsize(file):
+            reader = PickleReader(file)
+            self.offsets, self.firsts, self.count, end = reader.frame_index()
+            self.out = open(file, 'r+b', buffering=buffer_size or -1)
+            # drop a frame cut short by a crash
+            self.out.truncate(end)
+            self.out.seek(end)
+        else:
+            self.out = open(file, 'wb', buffering=buffer_size or -1)
+            self.out.write(_STREAM_MAGIC)
+        if not index:
+            # an index of the stream being replaced or appended to would go stale
+            try:
+                os.remove(index_path(file))
+            except FileNotFoundError:
+                pass
+        self.buffer = io.BytesIO()
+        self.pickler = pickle.Pickler(self.buffer, protocol=protocol)
+        self.pending = 0
+
+    def write(self, record):
+        """
+        Pickles a record, writing the frame once it holds frame_size bytes
+        :param record: The record to be saved
+        """
+        self.pickler.dump(record)
+        # records are pickled independently of each other
+        self.pickler.clear_memo()
+        self.pending += 1
+        if self.buffer.tell() >= self.frame_size:
+            self.flush()
+
+    def append(self, record):
+        """
+        Alias of write so the writer can be used as the accumulator of the savers
+        :param record: The record to be saved
+        """
+        self.write(record)
+
+    def extend(self, records):
+        """
+        :param records: Iterable of the records to be saved
+        """
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """
+        Writes the pickled records as a frame
+        """
+        if not self.pending:
+            return
+        payload = self.buffer.getbuffer()
+        self.offsets.append(self.out.tell())
+        self.firsts.append(self.count)
+        self.out.write(_FRAME_HEADER.pack(payload.nbytes, self.pending))
+        self.out.write(payload)
+        del payload
+        self.count += self.pending
+        self.pending = 0
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self):
+        """
+        Writes the last frame, closes the file and saves the frame index
+        """
+        if self.out.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self.out.close()
+        if self.index:
+            _save_frame_index(self.file, self.offsets, self.firsts, self.count, os.stat(self.file))
+
+    def __len__(self):
+        """
+        :return: The number of records in the stream
+        """
+        return self.count + self.pending
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class PickleReader(object):
+    """
+    Lazily reads the records of a pickle stream written by PickleWriter, one frame at a time.
+    The frame index is loaded from the sidecar file when it is up to date, otherwise it is rebuilt by
+    scanning the frame headers, and is used to seek to record N or split the stream into ranges
+    of records for parallel readers.
+
+    Example:
+        reader = PickleReader('records.pkls')
+        for start, stop in reader.split(4):
+            pool.submit(process, list(read_pickles('records.pkls', start, stop)))
+    """
+
+    def __init__(self, file, buffer_size=None):
+        """
+        :param file: Path to the stream file
+        :param buffer_size: Optional size of the read buffer of the file
+        """
+        if file is None:
+            raise ValueError('Must supply a path to the pickle stream file')
+        self.file = file
+        self.buffer_size = buffer_size
+        self._index = None
+        self._stat = None
+
+    def frame_index(self):
+        """
+        :return: Tuple of the offsets array of the frames, the array of the number of the first record
+        of each frame, the total number of records and the offset the complete frames end at
+        """
+        st = os.stat(self.file)
+        if self._index is None or self._stat != (st.st_size, st.st_mtime_ns):
+            index = _load_frame_index(self.file, st)
+            if index is None:
+                with open(self.file, 'rb') as f:
+                    if f.read(len(_STREAM_MAGIC)) != _STREAM_MAGIC:
+                        raise ValueError('%s is not a pickle stream file' % self.file)
+                    index = _scan_frames(f, st.st_size)
+            self._index = index
+            self._stat = (st.st_size, st.st_mtime_ns)
+        return self._index
+
+    def read(self, start=0, stop=None):
+        """
+        Reads a range of records, seeking to the frame holding record start
+        :param start: Number of the first record, starting at 0
+        :param stop: Optional number of the record the range ends at (exclusive). Defaults to the end of the stream
+        :return: Generator yielding the records
+        """
+        offsets, firsts, records, end = self.frame_index()
+        stop = records if stop is None else min(stop, records)
+        if start >= stop:
+            return
+        frame = bisect_right(firsts, start) - 1
+        n = firsts[frame]
+        with open(self.file, 'rb', buffering=self.buffer_size or -1) as f:
+            f.seek(offsets[frame])
+            while n < stop and f.tell() < end:
+                nbytes, count = _FRAME_HEADER.unpack(f.read(_FRAME_HEADER.size))
+                unpickler = pickle.Unpickler(io.BytesIO(f.read(nbytes)))
+                for _ in range(count):
+                    if n >= stop:
+                        break
+                    record = unpickler.load()
+                    if n >= start:
+                        yield record
+                    n += 1
+
+    def __iter__(self):
+        return self.read()
+
+    def __len__(self):
+        """
+        :return: The number of records in the stream
+        """
+        return self.frame_index()[2]
+
+    def __getitem__(self, n):
+        records = len(self)
+        if n < 0:
+            n += records
+        if n < 0 or n >= records:
+            raise IndexError('record %d out of range, the stream has %d records' % (n, records))
+        return next(self.read(n, n + 1))
+
+    def split(self, parts):
+        """
+        Splits the records of the stream into ranges of roughly equal record counts starting on frame boundaries
+        :param parts: Number of ranges
+        :return: List of (start, stop) record numbers
+        """
+        offsets, firsts, records, _ = self.frame_index()
+        parts = max(min(parts, len(firsts)), 1)
+        bounds = [firsts[len(firsts) * i // parts] if i < parts else records for i in range(parts + 1)] \
+            if len(firsts) else [0, 0]
+        return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+def dump_pickles(records, file, protocol=None, frame_size=1 << 16, index=True, append=False):
+    """
+    Pickles the records of an iterable one by one into a pickle stream file, see PickleWriter
+    :param records: Iterable of the records, i.e. a generator
+    :param file: Path to the stream file
+    :param protocol: Optional pickle protocol. Defaults to pickle.DEFAULT_PROTOCOL
+    :param frame_size: Number of pickled bytes after which a frame is written. Defaults to 64 KiB
+    :param index: Optional boolean flag indicating the frame index is saved, otherwise an existing one is removed.
+    Defaults to True
+    :param append: Optional boolean flag indicating records are appended to an existing stream. Defaults to False
+    :return: The number of records in the stream
+    """
+    with PickleWriter(file, protocol=protocol, frame_size=frame_size, index=index, append=append) as out:
+        out.extend(records)
+    return len(out)
+
+
+def read_pickles(file, start=0, stop=None):
+    """
+    Lazily reads the records of a pickle stream file, see PickleReader
+    :param file: Path to the stream file
+    :param start: Optional number of the first record. Defaults to 0
+    :param stop: Optional number of the record the range ends at (exclusive). Defaults to the end of the stream
+    :return: Generator yielding the records
+    """
+    return PickleReader(file).read(start, stop)
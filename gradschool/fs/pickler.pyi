@@ -1,5 +1,125 @@
-from typing import Any
+import os
+from array import array
+from io import BufferedRandom, BufferedWriter, BytesIO
+from pickle import Pickler
+from struct import Struct
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-def dump_pickle(obj: Any, file: str) -> None: pass
+_BUFFERS_MAGIC: bytes
+_BUFFERS_HEADER: Struct
+_BUFFER_ENTRY: Struct
+_BUFFER_ALIGNMENT: int
+_STREAM_MAGIC: bytes
+_FRAME_HEADER: Struct
+_INDEX_MAGIC: bytes
+_INDEX_HEADER: Struct
 
-def read_pickle(name: str) -> Any: pass
\ No newline at end of file
+
+def buffers_path(file: str) -> str: pass
+
+
+def _is_buffers_file(path: str) -> bool: pass
+
+
+def _aligned(offset: int) -> int: pass
+
+
+def _write_buffers(path: str, buffers: Sequence[memoryview]) -> None: pass
+
+
+def _read_buffers(path: str, use_mmap: bool = True, writable: bool = True) -> List[Union[memoryview, bytearray]]: pass
+
+
+def dump_pickle(obj: Any,
+                file: str,
+                protocol: Optional[int] = None,
+                out_of_band: bool = False,
+                min_buffer_size: int = 1 << 16,
+                buffer_size: Optional[int] = None) -> None: pass
+
+
+def read_pickle(name: str,
+                use_mmap: bool = True,
+                writable: bool = True,
+                buffer_size: Optional[int] = None) -> Any: pass
+
+
+def index_path(file: str) -> str: pass
+
+
+def _scan_frames(f: BinaryIO, size: int) -> Tuple[array, array, int, int]: pass
+
+
+def _load_frame_index(file: str, st: os.stat_result) -> Optional[Tuple[array, array, int, int]]: pass
+
+
+def _save_frame_index(file: str, offsets: array, firsts: array, records: int, st: os.stat_result) -> None: pass
+
+
+class PickleWriter(object):
+    file: str
+    frame_size: int
+    index: bool
+    offsets: array
+    firsts: array
+    count: int
+    out: Union[BufferedWriter, BufferedRandom]
+    buffer: BytesIO
+    pickler: Pickler
+    pending: int
+
+    def __init__(self,
+                 file: str,
+                 protocol: Optional[int] = None,
+                 frame_size: int = 1 << 16,
+                 index: bool = True,
+                 append: bool = False,
+                 buffer_size: Optional[int] = None) -> None: pass
+
+    def write(self, record: Any) -> None: pass
+
+    def append(self, record: Any) -> None: pass
+
+    def extend(self, records: Iterable[Any]) -> None: pass
+
+    def flush(self) -> None: pass
+
+    def close(self) -> None: pass
+
+    def __len__(self) -> int: pass
+
+    def __enter__(self) -> 'PickleWriter': pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None: pass
+
+
+class PickleReader(object):
+    file: str
+    buffer_size: Optional[int]
+    _index: Optional[Tuple[array, array, int, int]]
+    _stat: Optional[Tuple[int, int]]
+
+    def __init__(self, file: str, buffer_size: Optional[int] = None) -> None: pass
+
+    def frame_index(self) -> Tuple[array, array, int, int]: pass
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]: pass
+
+    def __iter__(self) -> Iterator[Any]: pass
+
+    def __len__(self) -> int: pass
+
+    def __getitem__(self, n: int) -> Any: pass
+
+    def split(self, parts: int) -> List[Tuple[int, int]]: pass
+
+
+def dump_pickles(records: Iterable[Any],
+                 file: str,
+                 protocol: Optional[int] = None,
+                 frame_size: int = 1 << 16,
+                 index: bool = True,
+                 append: bool = False) -> int: pass
+
+
+def read_pickles(file: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]: pass
@@ -1,15 +1,32 @@
+import codecs
 import csv
+import io
+import locale
+import mmap
 import os
+import re
+import time
+from array import array
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from functools import partial
+from itertools import chain, islice
 
 from ..fn import identity
+from .compression import codec_from_extension, is_compressed, open_file
+from .extsort import DEFAULT_MEMORY_LIMIT, external_sort
 from .savers import AutoSaver
 
 try:
     import ujson as json
 except ImportError:
     import json
+from json import JSONDecoder, JSONDecodeError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def stripline(line, stripboth=False):
@@ -25,26 +42,395 @@ def stripline(line, stripboth=False):
     return line.rstrip()
 
 
-def tail(filep, n=10):
+_BOM_CODECS = {
+    'utf-8-sig': ((codecs.BOM_UTF8, 'utf-8'),),
+    'utf-16': ((codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be')),
+    'utf-32': ((codecs.BOM_UTF32_LE, 'utf-32-le'), (codecs.BOM_UTF32_BE, 'utf-32-be')),
+}
+
+
+def _line_codec(f, encoding):
+    """
+    Determines how the lines of a file opened in binary mode are found and decoded.
+    For the codecs using a byte order mark the mark is read from the start of the file
+    :param f: The file opened in binary mode
+    :param encoding: The text encoding of the file, None for the locale's preferred encoding
+    :return: Tuple of the byte order mark free codec name and the bytes of a newline in that codec
     """
-    Returns the last n lines of file
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    name = codecs.lookup(encoding).name
+    if name in _BOM_CODECS:
+        boms = _BOM_CODECS[name]
+        pos = f.tell()
+        f.seek(0)
+        head = f.read(4)
+        f.seek(pos)
+        name = boms[0][1]
+        for bom, codec in boms:
+            if head.startswith(bom):
+                name = codec
+                break
+    return name, '\n'.encode(name)
+
+
+def _split_lines(data, nl):
+    """
+    Splits data after every newline. Multi byte newlines (utf-16, utf-32) only count when found at an
+    offset that is a multiple of their length, data must start on such an offset
+    :param data: The bytes to split
+    :param nl: The bytes of a newline
+    :return: Tuple of the list of complete lines and the trailing bytes not terminated by a newline
+    """
+    unit = len(nl)
+    lines = []
+    start = 0
+    idx = data.find(nl)
+    while idx != -1:
+        if idx % unit == 0:
+            lines.append(data[start:idx + unit])
+            start = idx + unit
+            idx = data.find(nl, start)
+        else:
+            idx = data.find(nl, idx + 1)
+    return lines, data[start:]
+
+
+def _tail_offset(f, n, nl, blocksize):
+    """
+    Finds the offset of the start of the last n lines of a file by reading it backwards from its end
+    in blocks and counting newlines. A newline ending the file terminates the last line
+    :param f: The file opened in binary mode
+    :param n: How many lines
+    :param nl: The bytes of a newline
+    :param blocksize: Number of bytes read at a time
+    :return: Offset of the first of the last n lines
+    """
+    unit = len(nl)
+    blocksize = max(blocksize - blocksize % unit, unit)
+    end = f.seek(0, os.SEEK_END)
+    if end >= unit:
+        f.seek(end - unit)
+        if f.read(unit) == nl:
+            end -= unit
+    found = 0
+    pos = end
+    while pos > 0:
+        start = max(pos - blocksize, 0)
+        start -= start % unit
+        f.seek(start)
+        block = f.read(pos - start)
+        hi = len(block)
+        idx = block.rfind(nl, 0, hi)
+        while idx != -1:
+            if (start + idx) % unit == 0:
+                found += 1
+                if found == n:
+                    return start + idx + unit
+            hi = idx + unit - 1
+            idx = block.rfind(nl, 0, hi)
+        pos = start
+    return 0
+
+
+def _decode_lines(lines, codec, at_start):
+    """
+    Decodes lines read in binary mode, translating \\r\\n line endings to \\n like text mode does
+    :param lines: List of the lines as bytes
+    :param codec: The byte order mark free codec name
+    :param at_start: Do the lines start at the beginning of the file, if so a byte order mark is removed
+    :return: List of the decoded lines
+    """
+    decoded = [line.decode(codec).replace('\r\n', '\n') for line in lines]
+    if at_start and decoded and decoded[0].startswith('\ufeff'):
+        decoded[0] = decoded[0][1:]
+        if not decoded[0]:
+            del decoded[0]
+    return decoded
+
+
+def tail(filep, n=10, encoding=None, binary=False, blocksize=8192,
+         follow=False, interval=1.0):
+    """
+    Returns the last n lines of file.
+    The file is read backwards from its end in blocks until n lines are found, so the cost depends
+    on n and the length of the lines rather than the size of the file.
+    Lines are separated by \\n, \\r\\n is translated to \\n when not in binary mode.
     :param filep: Path to the file
     :param n: How many lines to keeps. Defaults to 10
-    :return: list containing the last n lines
+    :param encoding: Optional text encoding of the file. Defaults to the locale's preferred encoding like open
+    :param binary: Optional boolean flag indicating the lines are returned as bytes, undecoded. Defaults to False
+    :param blocksize: Number of bytes read at a time. Defaults to 8192
+    :param follow: Optional boolean flag indicating the lines appended to the file should be followed,
+    see tailf. Defaults to False
+    :param interval: Seconds between checks for new lines when following. Defaults to 1
+    :return: list containing the last n lines, or if following, the generator returned by tailf
+    """
+    if follow:
+        return tailf(filep, n=n, encoding=encoding, binary=binary,
+                     blocksize=blocksize, interval=interval)
+    if n <= 0:
+        return []
+    if is_compressed(filep):
+        # compressed files can not be read backwards, they are decompressed keeping the last n lines
+        with open_file(filep, 'rb' if binary else 'r', encoding=None if binary else encoding) as f:
+            return list(deque(f, maxlen=n))
+    with open(filep, 'rb') as f:
+        if binary:
+            codec, nl = None, b'\n'
+        else:
+            codec, nl = _line_codec(f, encoding)
+        offset = _tail_offset(f, n, nl, blocksize)
+        f.seek(offset)
+        lines, rest = _split_lines(f.read(), nl)
+    if rest:
+        lines.append(rest)
+    if binary:
+        return lines
+    return _decode_lines(lines, codec, offset == 0)
+
+
+def tailf(filep, n=10, encoding=None, binary=False, blocksize=8192,
+          interval=1.0, idle_timeout=None):
+    """
+    Yields the last n lines of a file and then the lines appended to it as it grows, like tail -f.
+    Growth is detected by polling: every interval seconds the new bytes, if any, are read from the
+    current position, the file is never read again from the start. A line is only yielded once its
+    newline has been written. If the file is truncated reading restarts from its start and if the path
+    is replaced by a new file, i.e. log rotation, the new file is followed.
+    :param filep: Path to the file
+    :param n: How many of the existing lines to yield first. Defaults to 10
+    :param encoding: Optional text encoding of the file. Defaults to the locale's preferred encoding like open
+    :param binary: Optional boolean flag indicating the lines are yielded as bytes, undecoded. Defaults to False
+    :param blocksize: Number of bytes read at a time when finding the last n lines. Defaults to 8192
+    :param interval: Seconds between checks for new lines. Defaults to 1
+    :param idle_timeout: Optional number of seconds without new lines after which the generator stops.
+    Defaults to following forever
+    :return: Generator yielding the lines of the file
     """
-    with open(filep) as f:
-        return list(deque(f, maxlen=n))
+    if is_compressed(filep):
+        raise ValueError('Can not follow a compressed file')
+    f = open(filep, 'rb')
+    try:
+        if binary:
+            codec, nl = None, b'\n'
+        else:
+            codec, nl = _line_codec(f, encoding)
+        offset = _tail_offset(f, n, nl, blocksize) if n > 0 else f.seek(0, os.SEEK_END)
+        f.seek(offset)
+        at_start = offset == 0
+        pending = b''
+        idle = 0.0
+        while True:
+            data = f.read()
+            if data:
+                lines, pending = _split_lines(pending + data, nl)
+                if lines:
+                    idle = 0.0
+                    yield from (lines if binary else _decode_lines(lines, codec, at_start))
+                    at_start = False
+                continue
+            try:
+                st = os.stat(filep)
+            except FileNotFoundError:
+                st = None
+            if st is not None and st.st_ino != os.fstat(f.fileno()).st_ino:
+                f.close()
+                f = open(filep, 'rb')
+                pending = b''
+                at_start = True
+                continue
+            if st is not None and st.st_size < f.tell():
+                f.seek(0)
+                pending = b''
+                at_start = True
+                continue
+            if idle_timeout is not None and idle >= idle_timeout:
+                return
+            time.sleep(interval)
+            idle += interval
+    finally:
+        f.close()
 
 
-def read_plaintext(textfilep, mapper=None):
+class LazyLine(object):
     """
-    Reads a plain text file line by line
+    A line of a memory mapped file that is only decoded when its text is used.
+    The byte level checks (startswith, find, in) work directly on the mapped file without copying the line.
+    """
+
+    __slots__ = ('buf', 'start', 'end', 'encoding', '_text')
+
+    def __init__(self, buf, start, end, encoding):
+        """
+        :param buf: The memory mapped file
+        :param start: Offset of the start of the line
+        :param end: Offset of the end of the line, after its newline
+        :param encoding: The text encoding used to decode the line
+        """
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self.encoding = encoding
+        self._text = None
+
+    @property
+    def raw(self):
+        """
+        :return: A zero-copy memoryview of the line
+        """
+        return memoryview(self.buf)[self.start:self.end]
+
+    @property
+    def text(self):
+        """
+        :return: The decoded line, decoded on first use
+        """
+        if self._text is None:
+            self._text = self.buf[self.start:self.end].decode(
+                self.encoding).replace('\r\n', '\n')
+        return self._text
+
+    def startswith(self, prefix):
+        """
+        :param prefix: Bytes the line may start with
+        :return: True if the undecoded line starts with prefix
+        """
+        end = self.start + len(prefix)
+        return end <= self.end and self.buf[self.start:end] == prefix
+
+    def find(self, sub):
+        """
+        :param sub: Bytes to find in the undecoded line
+        :return: The index of sub in the line, -1 if not found
+        """
+        idx = self.buf.find(sub, self.start, self.end)
+        return idx if idx == -1 else idx - self.start
+
+    def __contains__(self, sub):
+        return self.buf.find(sub, self.start, self.end) != -1
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __bytes__(self):
+        return self.buf[self.start:self.end]
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return 'LazyLine(%r)' % self.buf[self.start:self.end]
+
+
+_NEWLINE = re.compile(b'\n')
+
+
+def _mmap_lines(filep, lazy, encoding):
+    """
+    Memory maps a file and yields its lines, including their newline, without copying them.
+    The yielded lines remain valid after the generator finishes
+    :param filep: Path to the file
+    :param lazy: Should LazyLine objects be yielded rather than memoryview slices
+    :param encoding: The text encoding used by the LazyLine objects
+    :return: Generator yielding the lines of the file
+    """
+    with open(filep, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = None if lazy else memoryview(mm)
+    try:
+        start = 0
+        if lazy:
+            for match in _NEWLINE.finditer(mm):
+                end = match.end()
+                yield LazyLine(mm, start, end, encoding)
+                start = end
+            if start < size:
+                yield LazyLine(mm, start, size, encoding)
+        else:
+            for match in _NEWLINE.finditer(mm):
+                end = match.end()
+                yield view[start:end]
+                start = end
+            if start < size:
+                yield view[start:size]
+    finally:
+        # the mapping is left open for the yielded lines still referenced, it is closed once they are collected
+        if view is not None:
+            view.release()
+            try:
+                mm.close()
+            except BufferError:
+                pass
+
+
+def _stream_lines(filep, lazy, encoding):
+    """
+    Yields the lines of a compressed file, which can not be memory mapped, as bytes or LazyLine objects
+    :param filep: Path to the file
+    :param lazy: Should LazyLine objects be yielded rather than bytes
+    :param encoding: The text encoding used by the LazyLine objects
+    :return: Generator yielding the lines of the file
+    """
+    with open_file(filep, 'rb') as f:
+        if lazy:
+            for line in f:
+                yield LazyLine(line, 0, len(line), encoding)
+        else:
+            yield from f
+
+
+def _map_lines(lines, mapper, batch_size):
+    """
+    :return: Generator yielding the lines, or lists of batch_size lines, with mapper applied to each
+    """
+    if batch_size is None:
+        if mapper is None:
+            yield from lines
+        else:
+            yield from map(mapper, lines)
+        return
+    lines = iter(lines)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch if mapper is None else mapper(batch)
+
+
+def read_plaintext(textfilep, mapper=None, binary=False, lazy=False,
+                   batch_size=None, encoding=None):
+    """
+    Reads a plain text file line by line.
+    In binary or lazy mode the file is memory mapped and the lines are yielded as slices of
+    the mapping without being copied or decoded, which works for ASCII compatible encodings, i.e. utf-8.
+    Compressed files (gzip, bz2, xz) are decompressed while reading, in binary mode their lines are yielded as bytes.
     :param textfilep: Path to text file
-    :param mapper: Optional function to be applied to each line of file
+    :param mapper: Optional function to be applied to each line of file,
+    or to each list of lines when batch_size is supplied
+    :param binary: Optional boolean flag indicating the lines are yielded as zero-copy memoryview slices
+    of the memory mapped file. Defaults to False
+    :param lazy: Optional boolean flag indicating the lines are yielded as LazyLine objects that are
+    only decoded when their text is used. Defaults to False
+    :param batch_size: Optional number of lines yielded at a time as a list.
+    The mapper is then called once per list, amortizing the call overhead
+    :param encoding: Optional text encoding of the file. Defaults to the locale's preferred encoding like open
     :return: Generator yield each line of the file
     """
-    with open(os.path.expanduser(textfilep), 'r') as textin:
-        if mapper is not None:
+    filep = os.path.expanduser(textfilep)
+    if binary or lazy:
+        if encoding is None:
+            encoding = locale.getpreferredencoding(False)
+        lines = _stream_lines if is_compressed(filep) else _mmap_lines
+        yield from _map_lines(lines(filep, lazy, encoding), mapper, batch_size)
+        return
+    with open_file(filep, 'r', encoding=encoding) as textin:
+        if batch_size is not None:
+            yield from _map_lines(textin, mapper, batch_size)
+        elif mapper is not None:
             for line in textin:
                 yield mapper(line)
         else:
@@ -71,7 +457,7 @@ class CSVFile(object):
         :param restval: Optional key name for the keys of fieldnames not found in a row
         :param dialect: Optional csv data format
         """
-        self.csvin = open(os.path.expanduser(csv_path), 'r')
+        self.csvin = open_file(os.path.expanduser(csv_path), 'r')
         self.reader = csv.DictReader(
             self.csvin,
             fieldnames=fieldnames,
@@ -107,6 +493,517 @@ def read_csv(csv_path, fieldnames=None, restkey=None,
         return csvfile
 
 
+def _record_end(f, pos, quote, parity, blocksize=1 << 20):
+    """
+    Finds the end of the csv record containing the byte at pos.
+    A newline ends a record when an even number of quote characters precede it
+    :param f: The csv file opened in binary mode
+    :param pos: Offset to search from
+    :param quote: The quote character as bytes, None if quoted newlines are not considered
+    :param parity: Number of quote characters before pos modulo 2
+    :param blocksize: Number of bytes read at a time
+    :return: Tuple of the offset after the newline ending the record (the end of the file if none)
+    and the quote parity at that offset
+    """
+    f.seek(pos)
+    while True:
+        block = f.read(blocksize)
+        if not block:
+            return pos, parity
+        counted = 0
+        idx = block.find(b'\n')
+        while idx != -1:
+            if quote is not None:
+                parity = (parity + block.count(quote, counted, idx)) % 2
+                counted = idx
+            if parity == 0:
+                return pos + idx + 1, parity
+            idx = block.find(b'\n', idx + 1)
+        if quote is not None:
+            parity = (parity + block.count(quote, counted)) % 2
+        pos += len(block)
+
+
+def csv_ranges(csv_path, parts, header=True, quoted_newlines=True, quotechar='"'):
+    """
+    Splits a csv file into byte ranges of roughly equal size aligned to record boundaries.
+    With quoted_newlines the quote characters of the whole file are counted, sequentially, so that newlines
+    inside quoted values never split a range. Without it the file is only read around the split points
+    :param csv_path: Path to csv file
+    :param parts: Number of ranges
+    :param header: Optional boolean flag indicating the first record is a header, excluded from the ranges
+    :param quoted_newlines: Optional boolean flag indicating values may contain quoted newlines. Defaults to True
+    :param quotechar: The quote character of the file. Defaults to "
+    :return: Tuple of the header's (start, end) byte offsets, None if there is no header,
+    and the list of (start, end) byte offsets of the ranges
+    """
+    if is_compressed(csv_path):
+        raise ValueError('Can not split a compressed file into byte ranges')
+    quote = quotechar.encode('utf-8') if quoted_newlines and quotechar else None
+    size = os.path.getsize(csv_path)
+    ranges = []
+    with open(csv_path, 'rb') as f:
+        start = _record_end(f, 0, quote, 0)[0] if header else 0
+        header_range = (0, start) if header else None
+        parts = max(parts, 1)
+        for i in range(1, parts):
+            target = start + (size - start) * i // parts
+            if ranges and target <= ranges[-1][1]:
+                continue
+            prev = ranges[-1][1] if ranges else start
+            parity = 0
+            if quote is not None:
+                f.seek(prev)
+                remaining = target - prev
+                while remaining > 0:
+                    block = f.read(min(remaining, 1 << 20))
+                    if not block:
+                        break
+                    parity = (parity + block.count(quote)) % 2
+                    remaining -= len(block)
+            end = _record_end(f, target, quote, parity)[0]
+            if end >= size:
+                break
+            ranges.append((prev, end))
+        last = ranges[-1][1] if ranges else start
+        if last < size:
+            ranges.append((last, size))
+    return header_range, ranges
+
+
+def _parse_csv_range(csv_path, start, end, fieldnames, reducer, encoding, dialect, fmtparams):
+    """
+    Parses the records in a byte range of a csv file, run by the worker processes of read_csv_parallel
+    :return: The list of rows, or the result of applying reducer to it
+    """
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding)
+    csvin = io.StringIO(text, newline='')
+    if fieldnames is None:
+        rows = list(csv.reader(csvin, dialect=dialect, **fmtparams))
+    else:
+        rows = list(csv.DictReader(csvin, fieldnames=fieldnames, dialect=dialect, **fmtparams))
+    return rows if reducer is None else reducer(rows)
+
+
+def read_csv_parallel(csv_path, reducer=None, workers=None, parts=None, ordered=True,
+                      header=True, fieldnames=None, as_dict=True, quoted_newlines=True,
+                      encoding='utf-8', dialect='excel', **fmtparams):
+    """
+    Reads a csv file in parallel. The file is split into byte ranges aligned to record boundaries
+    (see csv_ranges) that are parsed by a pool of worker processes.
+    Supplying a reducer runs it in the workers on the rows of each range, so aggregations
+    do not need every row shipped back to this process.
+
+    Example:
+        def count_rows(rows):
+            return len(rows)
+
+        total = sum(read_csv_parallel('big.csv', reducer=count_rows))
+
+    :param csv_path: Path to csv file to be read
+    :param reducer: Optional function called with the list of rows of each range in the workers. Must be picklable
+    :param workers: Optional number of worker processes. Defaults to the number of CPUs
+    :param parts: Optional number of byte ranges the file is split into. Defaults to four per worker
+    :param ordered: Optional boolean flag indicating the results are yielded in file order,
+    otherwise they are yielded as soon as a range has been parsed. Defaults to True
+    :param header: Optional boolean flag indicating the first record is a header. Defaults to True
+    :param fieldnames: Optional list of fieldnames. Defaults to the header
+    :param as_dict: Optional boolean flag indicating rows are dicts, like csv.DictReader,
+    rather than lists. Defaults to True
+    :param quoted_newlines: Optional boolean flag indicating values may contain quoted newlines, see csv_ranges.
+    Defaults to True
+    :param encoding: Text encoding of the file. Defaults to utf-8
+    :param dialect: Optional csv data format
+    :param fmtparams: Additional csv format parameters
+    :return: Generator yielding the rows, or the result of reducer for each range if supplied.
+    At most two ranges per worker are parsed ahead of the consumer
+    """
+    if isinstance(dialect, str):
+        quotechar = fmtparams.get('quotechar', csv.get_dialect(dialect).quotechar)
+    else:
+        quotechar = fmtparams.get('quotechar', dialect.quotechar)
+    workers = workers or os.cpu_count() or 1
+    header_range, ranges = csv_ranges(csv_path, parts or workers * 4, header=header,
+                                      quoted_newlines=quoted_newlines, quotechar=quotechar)
+    if as_dict and fieldnames is None:
+        if header_range is None:
+            raise ValueError('Must supply fieldnames to read rows as dicts from a csv file without a header')
+        fieldnames = _parse_csv_range(csv_path, header_range[0], header_range[1], None, None,
+                                      encoding, dialect, fmtparams)[0]
+    if not as_dict:
+        fieldnames = None
+    ranges = deque(ranges)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while ranges or pending:
+            while ranges and len(pending) < workers * 2:
+                start, end = ranges.popleft()
+                pending.append(executor.submit(_parse_csv_range, csv_path, start, end, fieldnames,
+                                               reducer, encoding, dialect, fmtparams))
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending = deque(not_done)
+            for future in done:
+                if reducer is None:
+                    yield from future.result()
+                else:
+                    yield future.result()
+
+
+def _is_type(values, typ):
+    try:
+        for v in values:
+            typ(v)
+    except (ValueError, OverflowError):
+        return False
+    return True
+
+
+def infer_column_type(values):
+    """
+    Infers the type of a csv column from a sample of its values
+    :param values: The sampled string values of the column
+    :return: int, float or str. Integer columns with empty values are inferred as float
+    """
+    present = [v for v in values if v != '']
+    if not present:
+        return str
+    if _is_type(present, int):
+        return int if len(present) == len(values) else float
+    if _is_type(present, float):
+        return float
+    return str
+
+
+def _to_float(value):
+    return float(value) if value != '' else float('nan')
+
+
+class _Column(object):
+    """
+    Storage for a column read by read_csv_columns, promoting its type when a value does not fit
+    """
+
+    __slots__ = ('typ', 'data')
+
+    def __init__(self, typ):
+        self.typ = typ
+        if typ is int:
+            self.data = array('q')
+        elif typ is float:
+            self.data = array('d')
+        else:
+            self.data = []
+
+    def append(self, value):
+        try:
+            if self.typ is int:
+                self.data.append(int(value))
+            elif self.typ is float:
+                self.data.append(_to_float(value))
+            elif self.data is not None:
+                self.data.append(value)
+        except (ValueError, OverflowError):
+            self.promote(value)
+            self.append(value)
+
+    def promote(self, value):
+        """
+        Widens the column so value fits, int to float and float to str.
+        Values already read are converted with float, a column widened to str no longer stores its values
+        (data is None) since their text can not be recovered from the numbers, it is read again by read_csv_columns
+        """
+        if (self.typ is int and value == '') or _is_type([value], float):
+            self.typ = float
+            self.data = array('d', self.data)
+        else:
+            self.typ = str
+            self.data = None
+
+
+def read_csv_columns(csv_path, columns=None, fieldnames=None, sample_size=1000,
+                     use_numpy=None, dialect='excel', **fmtparams):
+    """
+    Reads a csv file column wise. The type of each column (int, float or str) is inferred from
+    the first sample_size rows and numeric columns are stored in compact array.array buffers
+    ('q' for int, 'd' for float, empty float values are nan) or NumPy arrays rather than one dict per row.
+    A column that contains a value not fitting its inferred type later in the file is widened, int to float to str,
+    a column widened to str is read again so its values keep their original text.
+    Only the requested columns are converted and stored.
+    :param csv_path: Path to csv file to be read
+    :param columns: Optional list of the names of the columns to read. Defaults to all columns
+    :param fieldnames: Optional list of fieldnames. If not supplied the first row of the file is used
+    :param sample_size: Number of rows used to infer the column types. Defaults to 1000
+    :param use_numpy: Optional boolean flag indicating the columns are returned as NumPy arrays.
+    Defaults to using NumPy when it is installed
+    :param dialect: Optional csv data format
+    :param fmtparams: Additional csv format parameters
+    :return: dict of column name to its values (array.array, list of str or numpy.ndarray)
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ValueError('NumPy is not installed')
+    has_header = fieldnames is None
+    with open_file(os.path.expanduser(csv_path), 'r', newline='') as csvin:
+        reader = csv.reader(csvin, dialect=dialect, **fmtparams)
+        if has_header:
+            fieldnames = next(reader, [])
+        if columns is None:
+            columns = list(fieldnames)
+        positions = {name: i for i, name in enumerate(fieldnames)}
+        missing = [name for name in columns if name not in positions]
+        if missing:
+            raise ValueError('Unknown columns %s' % ', '.join(missing))
+        indexes = [positions[name] for name in columns]
+        sample = list(islice(reader, sample_size))
+        stored = []
+        for idx in indexes:
+            values = [row[idx] if idx < len(row) else '' for row in sample]
+            stored.append((idx, _Column(infer_column_type(values))))
+        for row in chain(sample, reader):
+            n = len(row)
+            for idx, column in stored:
+                column.append(row[idx] if idx < n else '')
+    widened = [(idx, column) for idx, column in stored if column.data is None]
+    if widened:
+        # columns widened to str are read again to keep the original text of the values read before
+        for _, column in widened:
+            column.data = []
+        with open_file(os.path.expanduser(csv_path), 'r', newline='') as csvin:
+            reader = csv.reader(csvin, dialect=dialect, **fmtparams)
+            if has_header:
+                next(reader, None)
+            for row in reader:
+                n = len(row)
+                for idx, column in widened:
+                    column.data.append(row[idx] if idx < n else '')
+    result = {}
+    for name, (_, column) in zip(columns, stored):
+        data = column.data
+        if use_numpy:
+            if column.typ is str:
+                data = numpy.array(data, dtype=object)
+            else:
+                dtype = numpy.int64 if column.typ is int else numpy.float64
+                data = numpy.frombuffer(data, dtype=dtype) if data else numpy.empty(0, dtype=dtype)
+        result[name] = data
+    return result
+
+
+# characters of the longest json token that can fail to decode when cut short, -Infinity
+_TRUNCATION_SLACK = 9
+
+
+class JsonStream(object):
+    """
+    Incremental json parser that reads a file in chunks and decodes the values found at a path one at a time,
+    so memory use is bounded by the size of the largest value rather than the size of the document.
+    Decoding of each value is done by json.JSONDecoder.raw_decode.
+    Values of object members that are not on the path are decoded and discarded.
+    """
+
+    def __init__(self, fileobj, chunk_size=65536):
+        """
+        :param fileobj: The file object, opened in text mode, containing the json document
+        :param chunk_size: Number of characters read at a time. Defaults to 65536
+        """
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """
+        Reads the next chunk, at least as many characters as are currently buffered so
+        values larger than a chunk are decoded in a logarithmic number of attempts
+        :return: True if more characters were read
+        """
+        if self.eof:
+            return False
+        data = self.fileobj.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _error(self, msg):
+        return ValueError('%s, near %r' % (msg, self.buf[self.pos:self.pos + 20]))
+
+    def peek(self):
+        """
+        Skips whitespace
+        :return: The next character or the empty string at the end of the file
+        """
+        while True:
+            buf = self.buf
+            n = len(buf)
+            pos = self.pos
+            while pos < n and buf[pos] in ' \t\n\r':
+                pos += 1
+            self.pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        """
+        Consumes the next non whitespace character, raising a ValueError if it is not char
+        """
+        if self.peek() != char:
+            raise self._error('Expected %r' % char)
+        self.pos += 1
+
+    def _truncated(self, error):
+        """
+        :return: True if the decoding error could be caused by the buffer ending inside the value,
+        within the longest literal (-Infinity) or escape of its end or inside a string
+        """
+        return error.pos >= len(self.buf) - _TRUNCATION_SLACK or error.msg.startswith('Unterminated string')
+
+    def value(self):
+        """
+        :return: The next decoded value
+        """
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError as e:
+                # only an error at the end of the buffer may be a value cut short by the chunk,
+                # others are malformed json and raised without reading the rest of the file
+                if not self._truncated(e) or not self._fill():
+                    raise
+                continue
+            # a value ending the buffer may continue in the next chunk, and a number near its end may be
+            # one cut short after its integer part or exponent marker, i.e. 1. or 1e-
+            if (end == len(self.buf) or (isinstance(obj, (int, float)) and not isinstance(obj, bool)
+                                         and end >= len(self.buf) - _TRUNCATION_SLACK)) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def members(self):
+        """
+        Iterates over the members of the next object. The caller must consume each member's value,
+        via value or another iteration, before advancing
+        :return: Generator yielding the key of each member
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self._error('Expected an object key')
+            self.expect(':')
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == '}':
+                return
+            if c != ',':
+                self.pos -= 1
+                raise self._error("Expected ',' or '}'")
+
+    def elements(self):
+        """
+        Iterates over the elements of the next array. The caller must consume each element,
+        via value or another iteration, before advancing
+        :return: Generator yielding the index of each element
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        idx = 0
+        while True:
+            yield idx
+            idx += 1
+            c = self.peek()
+            self.pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                self.pos -= 1
+                raise self._error("Expected ',' or ']'")
+
+    def items(self, path=()):
+        """
+        Yields the values found at path one at a time.
+        If the value at path is an array its elements are yielded, if it is an object (key, value) tuples
+        are yielded, otherwise the value itself is yielded
+        :param path: Sequence of object keys and array indexes leading to the values
+        :return: Generator yielding the values
+        """
+        if not path:
+            c = self.peek()
+            if c == '[':
+                for _ in self.elements():
+                    yield self.value()
+            elif c == '{':
+                for key in self.members():
+                    yield key, self.value()
+            else:
+                yield self.value()
+            return
+        step, rest = path[0], path[1:]
+        c = self.peek()
+        if isinstance(step, int) and c == '[':
+            children = self.elements()
+        elif isinstance(step, str) and c == '{':
+            children = self.members()
+        else:
+            raise self._error('The path component %r does not match the document' % (step,))
+        for child in children:
+            if child == step:
+                yield from self.items(rest)
+                return
+            self.value()
+
+
+def _json_path(path):
+    """
+    :return: The path as a tuple, a string is split on dots
+    """
+    if path is None:
+        return ()
+    if isinstance(path, str):
+        return tuple(path.split('.'))
+    return tuple(path)
+
+
+def iter_json(jsonfp, path=None, chunk_size=65536):
+    """
+    Incrementally reads a json file, yielding the values found at path one at a time with bounded memory.
+    If the value at path is an array its elements are yielded, if it is an object (key, value) tuples
+    are yielded, otherwise the value itself is yielded.
+
+    Example:
+        # {"meta": {...}, "results": {"records": [{...}, {...}, ...]}}
+        for record in iter_json('crawl.json', path='results.records'):
+            print(record)
+
+    :param jsonfp: Path to json file
+    :param path: Optional path to the values. A string of dot separated keys or a sequence of
+    object keys and array indexes. Defaults to the top level value
+    :param chunk_size: Number of characters read at a time. Defaults to 65536
+    :return: Generator yielding the values
+    """
+    with open_file(jsonfp, 'r') as jsonin:
+        yield from JsonStream(jsonin, chunk_size=chunk_size).items(_json_path(path))
+
+
 class JsonFile(object):
     """
     Utility class for reading json files.
@@ -114,18 +1011,32 @@ class JsonFile(object):
     Example:
        with JsonFile('example.json') as jsonfile:
            print(jsonfile)
+
+       with JsonFile('example.json', stream=True, path='records') as records:
+           for record in records:
+               print(record)
     """
 
-    def __init__(self, jsonfp):
+    def __init__(self, jsonfp, stream=False, path=None, chunk_size=65536):
         """
         :param jsonfp: Path to json file
+        :param stream: Optional boolean flag indicating the values at path should be read incrementally,
+        see iter_json. Defaults to False
+        :param path: Optional path to the values streamed. A string of dot separated keys or a sequence of
+        object keys and array indexes
+        :param chunk_size: Number of characters read at a time when streaming. Defaults to 65536
         """
-        self.jsonin = open(jsonfp, 'r')
+        self.jsonin = open_file(jsonfp, 'r')
+        self.stream = stream
+        self.path = path
+        self.chunk_size = chunk_size
 
     def __enter__(self):
         """
-        :return: The contents of the json file
+        :return: The contents of the json file, or if streaming a generator yielding the values at path
         """
+        if self.stream:
+            return JsonStream(self.jsonin, chunk_size=self.chunk_size).items(_json_path(self.path))
         return json.load(self.jsonin)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -141,6 +1052,74 @@ def read_json(jsonfp):
         return jsondata
 
 
+def read_jsonl(jsonlfp, start=0, end=None, mapper=None):
+    """
+    Reads a json lines file, one json value per line, skipping blank lines. Compressed files are decompressed
+    while reading, but can not be read by byte range.
+    Supplying start and end reads only the lines starting within that byte range,
+    so the ranges from jsonl_ranges can be read independently and in parallel
+    :param jsonlfp: Path to json lines file
+    :param start: Optional byte offset the range starts at. Defaults to 0
+    :param end: Optional byte offset the range ends at (exclusive). Defaults to the end of the file
+    :param mapper: Optional function to be applied to each decoded value
+    :return: Generator yielding the decoded values
+    """
+    if (start > 0 or end is not None) and is_compressed(jsonlfp):
+        raise ValueError('Can not read a byte range of a compressed file')
+    with open_file(jsonlfp, 'rb') as jsonin:
+        if start > 0:
+            jsonin.seek(start - 1)
+            jsonin.readline()
+        pos = jsonin.tell()
+        for line in jsonin:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            if line.strip():
+                yield json.loads(line) if mapper is None else mapper(json.loads(line))
+
+
+def jsonl_ranges(jsonlfp, parts):
+    """
+    Splits a json lines file into byte ranges of roughly equal size for read_jsonl
+    :param jsonlfp: Path to json lines file
+    :param parts: Number of ranges
+    :return: List of (start, end) byte offsets
+    """
+    if is_compressed(jsonlfp):
+        raise ValueError('Can not split a compressed file into byte ranges')
+    size = os.path.getsize(jsonlfp)
+    parts = max(min(parts, size), 1)
+    bounds = [size * i // parts for i in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _read_jsonl_range(jsonlfp, start, end, mapper):
+    return list(read_jsonl(jsonlfp, start=start, end=end, mapper=mapper))
+
+
+def map_jsonl(jsonlfp, mapper=None, workers=None, parts=None):
+    """
+    Reads a json lines file in parallel. The file is split into byte ranges
+    that are decoded, and have mapper applied, by a pool of worker processes
+    :param jsonlfp: Path to json lines file
+    :param mapper: Optional function to be applied to each decoded value in the workers. Must be picklable
+    :param workers: Optional number of worker processes. Defaults to the number of CPUs
+    :param parts: Optional number of byte ranges the file is split into. Defaults to four per worker
+    :return: Generator yielding the (mapped) values in file order.
+    At most two ranges per worker are decoded ahead of the consumer
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = deque(jsonl_ranges(jsonlfp, parts or workers * 4))
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while ranges or pending:
+            while ranges and len(pending) < workers * 2:
+                start, end = ranges.popleft()
+                pending.append(executor.submit(_read_jsonl_range, jsonlfp, start, end, mapper))
+            yield from pending.popleft().result()
+
+
 class FilePrinter(object):
     """
     Utility context class for printing the contents of a file
@@ -153,7 +1132,7 @@ class FilePrinter(object):
         :param line_transformer: Optional function to transform the file's lines before printing.
         Defaults to stripline
         """
-        self.file_obj = open(file_p, 'r')
+        self.file_obj = open_file(file_p, 'r')
         self.line_transformer = line_transformer
 
     def __enter__(self):
@@ -165,23 +1144,50 @@ class FilePrinter(object):
         self.file_obj.close()
 
 
+def _select_batch(lines, transformer, selector):
+    """
+    Applies the transformer and selector functions to a batch of lines, run by the worker processes of SelectFromFile
+    :return: List of the selected lines, the lines the transformer or selector returned None for are skipped
+    """
+    selected = []
+    for line in lines:
+        toyield = transformer(line)
+        if toyield is not None:
+            chosen = selector(toyield)
+            if chosen is not None:
+                selected.append(chosen)
+    return selected
+
+
 class SelectFromFile(object):
     """
     Utility context class that yields a generator that will apply a transformation and selector function
     to each line of the file.
     If the selector or transformer functions return none the line is skipped otherwise the line is yielded
+
+    Supplying workers applies the functions to batches of lines in a pool of worker processes.
+    The selected lines are still yielded in file order and reading stops while max_pending batches
+    are waiting to be consumed, bounding memory. The functions must then be picklable, i.e. module level functions.
     """
 
     def __init__(self, filep, selector=identity,
-                 transformer=partial(stripline, stripboth=True)):
+                 transformer=partial(stripline, stripboth=True),
+                 workers=None, batch_size=1000, max_pending=None):
         """
         :param filep: Path to file to select lines from
         :param selector: Optional selector function. Defaults to fn.identity
         :param transformer: Optional line transformer function. Defaults to stripline
+        :param workers: Optional number of worker processes. Defaults to selecting in the calling thread
+        :param batch_size: Number of lines sent to a worker at a time. Defaults to 1000
+        :param max_pending: Optional maximum number of batches in flight or waiting to be consumed.
+        Defaults to two per worker
         """
-        self.file_obj = open(filep, 'r')
+        self.file_obj = open_file(filep, 'r')
         self.line_transformer = transformer
         self.selector = selector
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max(max_pending or (workers or 1) * 2, 1)
 
     def _do_selection(self):
         """
@@ -194,7 +1200,32 @@ class SelectFromFile(object):
                 if selected is not None:
                     yield selected
 
+    def _do_parallel_selection(self):
+        """
+        :return: Generator yielding, in file order, the transformed and selected lines from the file
+        computed by the worker processes
+        """
+        pending = deque()
+        lines = iter(self.file_obj)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                while True:
+                    while len(pending) < self.max_pending:
+                        batch = list(islice(lines, self.batch_size))
+                        if not batch:
+                            break
+                        pending.append(executor.submit(
+                            _select_batch, batch, self.line_transformer, self.selector))
+                    if not pending:
+                        return
+                    yield from pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def __enter__(self):
+        if self.workers:
+            return self._do_parallel_selection()
         return self._do_selection()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -210,35 +1241,91 @@ class CleanFile(object):
         with CleanFile('example.txt', mapfn=lamda x: x.rstrip()) as flines:
             for line in flines:
                 print(line)
+
+    For files larger than memory supply external=True. The mapped lines are then sorted by extsort.external_sort
+    under memory_limit, optionally keeping only unique lines, and a generator of the sorted lines is returned
+    instead of a list. When saving, the lines are written straight to saveto as they are merged, lines not consumed
+    in the with block are written when it exits.
+
+    Example:
+        with CleanFile('urls.txt', save_back=True, mapfn=str.strip, external=True, unique=True) as flines:
+            pass
     """
 
     def __init__(self, filep, saveto=None, save_back=False,
-                 mapfn=identity, sortfn=identity):
+                 mapfn=identity, sortfn=identity, external=False,
+                 memory_limit=DEFAULT_MEMORY_LIMIT, unique=False, key=None, tmpdir=None):
         """
         :param filep: Path to file to be cleaned
         :param saveto: Optional path to file the clean contents of the file at filep will be saved to.
         Defaults to filep if save_back is True.
         :param save_back: Optional boolean flag indicating the clean lines should be save back to a file
         :param mapfn: String returning function applied to each line of file. Defaults to fn.identity
-        :param sortfn: Function returning the lines of the file at filep in sorted order. Defaults to fn.identity
+        :param sortfn: Function returning the lines of the file at filep in sorted order. Defaults to fn.identity.
+        Not used when external is True
+        :param external: Optional boolean flag indicating the mapped lines are sorted using an external merge sort.
+        Defaults to False
+        :param memory_limit: Approximate number of bytes of lines held in memory by the external sort.
+        Defaults to 64 MiB
+        :param unique: Optional boolean flag indicating the external sort drops duplicate lines. Defaults to False
+        :param key: Optional key function the external sort sorts by
+        :param tmpdir: Optional directory the external sort's temporary files are written to
         """
         if filep is None:
             raise ValueError(
                 'The path to the file to be read was not supplied')
         self.file_p = filep
         self.save_p = saveto if saveto is not None else filep
-        self.file_obj = open(filep, 'r')
+        self.file_obj = open_file(filep, 'r')
         self.mapfn = mapfn
         self.clean_lines = []
         self.save_back = save_back
         self.sort_output = sortfn
+        self.external = external
+        self.memory_limit = memory_limit
+        self.unique = unique
+        self.key = key
+        self.tmpdir = tmpdir
+        self.sorted_lines = None
+
+    def _save_sorted(self, lines, tmp):
+        """
+        :return: Generator writing each sorted line to tmp as it yields it
+        """
+        with open_file(tmp, 'w', codec=codec_from_extension(self.save_p)) as out:
+            for line in lines:
+                out.write('%s\n' % line)
+                yield line
 
     def __enter__(self):
+        if self.external:
+            self.sorted_lines = external_sort(
+                map(self.mapfn, self.file_obj), memory_limit=self.memory_limit,
+                key=self.key, unique=self.unique, tmpdir=self.tmpdir)
+            if self.save_back:
+                self.sorted_lines = self._save_sorted(self.sorted_lines, '%s.tmp' % self.save_p)
+            return self.sorted_lines
         for line in self.sort_output(self.file_obj):
             self.clean_lines.append(self.mapfn(line))
         return self.clean_lines
 
+    def _exit_external(self, exc_type):
+        tmp = '%s.tmp' % self.save_p
+        try:
+            if exc_type is None and self.save_back:
+                for _ in self.sorted_lines:
+                    pass
+                os.replace(tmp, self.save_p)
+        finally:
+            self.sorted_lines.close()
+            self.file_obj.close()
+            if self.save_back and os.path.exists(tmp):
+                os.remove(tmp)
+
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.external:
+            self._exit_external(exc_type)
+            return
         self.file_obj.close()
         if self.save_back:
             with AutoSaver(self.save_p, accu=list) as out:
@@ -1,22 +1,100 @@
-from csv import DictReader
-from typing import Any, Dict, Callable, Generator, List, Optional, Union, TextIO, Iterable
+from array import array
+from csv import Dialect, DictReader
+from json import JSONDecoder, JSONDecodeError
+from mmap import mmap
+from typing import Any, BinaryIO, Dict, Callable, Generator, IO, List, Optional, Pattern, Sequence, Tuple, Type, Union, TextIO, Iterable
 from functools import partial
 
 from ..fn import identity
+from .extsort import DEFAULT_MEMORY_LIMIT
 
 
 def stripline(line: str, stripboth: bool = False) -> str: pass
 
 
-def tail(filep: str, n: int = 10) -> List[str]: pass
+_BOM_CODECS: Dict[str, Tuple[Tuple[bytes, str], ...]]
+
+
+def _line_codec(f: BinaryIO, encoding: Optional[str]) -> Tuple[str, bytes]: pass
+
+
+def _split_lines(data: bytes, nl: bytes) -> Tuple[List[bytes], bytes]: pass
+
+
+def _tail_offset(f: BinaryIO, n: int, nl: bytes, blocksize: int) -> int: pass
+
+
+def _decode_lines(lines: List[bytes], codec: str, at_start: bool) -> List[str]: pass
+
+
+def tail(filep: str,
+         n: int = 10,
+         encoding: Optional[str] = None,
+         binary: bool = False,
+         blocksize: int = 8192,
+         follow: bool = False,
+         interval: float = 1.0) -> Union[List[str], List[bytes], Generator[Union[str, bytes]]]: pass
+
+
+def tailf(filep: str,
+          n: int = 10,
+          encoding: Optional[str] = None,
+          binary: bool = False,
+          blocksize: int = 8192,
+          interval: float = 1.0,
+          idle_timeout: Optional[float] = None) -> Generator[Union[str, bytes]]: pass
+
+
+class LazyLine(object):
+    buf: Union[mmap, bytes]
+    start: int
+    end: int
+    encoding: str
+    _text: Optional[str]
+
+    def __init__(self, buf: Union[mmap, bytes], start: int, end: int, encoding: str) -> None: pass
+
+    @property
+    def raw(self) -> memoryview: pass
+
+    @property
+    def text(self) -> str: pass
+
+    def startswith(self, prefix: bytes) -> bool: pass
+
+    def find(self, sub: bytes) -> int: pass
+
+    def __contains__(self, sub: bytes) -> bool: pass
+
+    def __len__(self) -> int: pass
+
+    def __bytes__(self) -> bytes: pass
+
+
+_NEWLINE: Pattern[bytes]
+
+
+def _mmap_lines(filep: str, lazy: bool, encoding: str) -> Generator[Union[memoryview, LazyLine]]: pass
+
+
+def _stream_lines(filep: str, lazy: bool, encoding: str) -> Generator[Union[bytes, LazyLine]]: pass
+
+
+def _map_lines(lines: Iterable[Any],
+               mapper: Optional[Callable[..., Any]],
+               batch_size: Optional[int]) -> Generator[Any]: pass
 
 
 def read_plaintext(textfilep: str,
-                   mapper: Optional[Callable[[str], Union[str, Any]]] = None) -> Generator[Union[str, Any]]: pass
+                   mapper: Optional[Callable[..., Any]] = None,
+                   binary: bool = False,
+                   lazy: bool = False,
+                   batch_size: Optional[int] = None,
+                   encoding: Optional[str] = None) -> Generator[Union[str, memoryview, LazyLine, List[Any], Any]]: pass
 
 
 class CSVFile(object):
-    csvin: TextIO
+    csvin: IO[str]
     reader: DictReader
 
     def __init__(self,
@@ -40,18 +118,133 @@ def read_csv(csv_path: str,
              *args: Any, **kwds: Any) -> DictReader: pass
 
 
+def _record_end(f: BinaryIO, pos: int, quote: Optional[bytes], parity: int,
+                blocksize: int = 1 << 20) -> Tuple[int, int]: pass
+
+
+def csv_ranges(csv_path: str,
+               parts: int,
+               header: bool = True,
+               quoted_newlines: bool = True,
+               quotechar: str = '"') -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]]]: pass
+
+
+def _parse_csv_range(csv_path: str,
+                     start: int,
+                     end: int,
+                     fieldnames: Optional[List[str]],
+                     reducer: Optional[Callable[[List[Any]], Any]],
+                     encoding: str,
+                     dialect: Union[str, Dialect],
+                     fmtparams: Dict[str, Any]) -> Any: pass
+
+
+def read_csv_parallel(csv_path: str,
+                      reducer: Optional[Callable[[List[Any]], Any]] = None,
+                      workers: Optional[int] = None,
+                      parts: Optional[int] = None,
+                      ordered: bool = True,
+                      header: bool = True,
+                      fieldnames: Optional[List[str]] = None,
+                      as_dict: bool = True,
+                      quoted_newlines: bool = True,
+                      encoding: str = 'utf-8',
+                      dialect: Union[str, Dialect] = 'excel',
+                      **fmtparams: Any) -> Generator[Any]: pass
+
+
+Column = Union[array, List[str], Any]
+
+
+def _is_type(values: Iterable[str], typ: Callable[[str], Any]) -> bool: pass
+
+
+def infer_column_type(values: List[str]) -> Type[Union[int, float, str]]: pass
+
+
+def _to_float(value: str) -> float: pass
+
+
+class _Column(object):
+    typ: Type[Union[int, float, str]]
+    data: Optional[Union[array, List[str]]]
+
+    def __init__(self, typ: Type[Union[int, float, str]]) -> None: pass
+
+    def append(self, value: str) -> None: pass
+
+    def promote(self, value: str) -> None: pass
+
+
+def read_csv_columns(csv_path: str,
+                     columns: Optional[List[str]] = None,
+                     fieldnames: Optional[List[str]] = None,
+                     sample_size: int = 1000,
+                     use_numpy: Optional[bool] = None,
+                     dialect: str = 'excel',
+                     **fmtparams: Any) -> Dict[str, Column]: pass
+
+
 ## Try to add some type hinting for json
 JsonPrimitive = Union[str, int, float, bool, None]
 JsonDict = Dict[str, Union[Dict[str, JsonPrimitive], Dict[str, Any], List[JsonPrimitive], List[Any], Any]]
 JsonList = List[Union[JsonPrimitive, List[JsonPrimitive], JsonDict, List[JsonDict], Any]]
 
 
+JsonPath = Union[str, Sequence[Union[str, int]]]
+
+
+_TRUNCATION_SLACK: int
+
+
+class JsonStream(object):
+    fileobj: TextIO
+    chunk_size: int
+    decoder: JSONDecoder
+    buf: str
+    pos: int
+    eof: bool
+
+    def __init__(self, fileobj: TextIO, chunk_size: int = 65536) -> None: pass
+
+    def _fill(self) -> bool: pass
+
+    def _error(self, msg: str) -> ValueError: pass
+
+    def peek(self) -> str: pass
+
+    def expect(self, char: str) -> None: pass
+
+    def _truncated(self, error: JSONDecodeError) -> bool: pass
+
+    def value(self) -> Any: pass
+
+    def members(self) -> Generator[str]: pass
+
+    def elements(self) -> Generator[int]: pass
+
+    def items(self, path: Sequence[Union[str, int]] = ()) -> Generator[Any]: pass
+
+
+def _json_path(path: Optional[JsonPath]) -> Tuple[Union[str, int], ...]: pass
+
+
+def iter_json(jsonfp: str, path: Optional[JsonPath] = None, chunk_size: int = 65536) -> Generator[Any]: pass
+
+
 class JsonFile(object):
-    jsonin: TextIO
+    jsonin: IO[str]
+    stream: bool
+    path: Optional[JsonPath]
+    chunk_size: int
 
-    def __init__(self, jsonfp: str) -> None: pass
+    def __init__(self,
+                 jsonfp: str,
+                 stream: bool = False,
+                 path: Optional[JsonPath] = None,
+                 chunk_size: int = 65536) -> None: pass
 
-    def __enter__(self) -> Union[JsonDict, JsonList]: pass
+    def __enter__(self) -> Union[JsonDict, JsonList, Generator[Any]]: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
 
@@ -59,8 +252,26 @@ class JsonFile(object):
 def read_json(jsonfp: str) -> Union[JsonDict, JsonList]: pass
 
 
+def read_jsonl(jsonlfp: str,
+               start: int = 0,
+               end: Optional[int] = None,
+               mapper: Optional[Callable[[Any], Any]] = None) -> Generator[Any]: pass
+
+
+def jsonl_ranges(jsonlfp: str, parts: int) -> List[Tuple[int, int]]: pass
+
+
+def _read_jsonl_range(jsonlfp: str, start: int, end: int, mapper: Optional[Callable[[Any], Any]]) -> List[Any]: pass
+
+
+def map_jsonl(jsonlfp: str,
+              mapper: Optional[Callable[[Any], Any]] = None,
+              workers: Optional[int] = None,
+              parts: Optional[int] = None) -> Generator[Any]: pass
+
+
 class FilePrinter(object):
-    file_obj: TextIO
+    file_obj: IO[str]
     line_transformer: Callable[..., Any]
 
     def __init__(self, file_p: str,
@@ -71,18 +282,31 @@ class FilePrinter(object):
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
 
 
+def _select_batch(lines: List[str],
+                  transformer: Callable[[str], Any],
+                  selector: Callable[..., Any]) -> List[Any]: pass
+
+
 class SelectFromFile(object):
-    file_obj: TextIO
+    file_obj: IO[str]
     line_transformer: Callable[..., Any]
     selector: Callable[..., Any]
+    workers: Optional[int]
+    batch_size: int
+    max_pending: int
 
     def __init__(self,
                  filep: str,
                  selector: Callable[..., Any] = identity,
-                 transformer: Callable[[str], str] = partial(stripline, stripboth=True)) -> None: pass
+                 transformer: Callable[[str], str] = partial(stripline, stripboth=True),
+                 workers: Optional[int] = None,
+                 batch_size: int = 1000,
+                 max_pending: Optional[int] = None) -> None: pass
 
     def _do_selection(self) -> Generator[Any]: pass
 
+    def _do_parallel_selection(self) -> Generator[Any]: pass
+
     def __enter__(self) -> Generator[Any]: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
@@ -91,19 +315,34 @@ class SelectFromFile(object):
 class CleanFile(object):
     file_p: str
     save_p: str
-    file_obj: TextIO
+    file_obj: IO[str]
     mapfn: Callable[[str], Any]
     clean_lines: List[Any]
     save_back: bool
     sort_output: Callable[[TextIO], Iterable[str]]
+    external: bool
+    memory_limit: int
+    unique: bool
+    key: Optional[Callable[[str], Any]]
+    tmpdir: Optional[str]
+    sorted_lines: Optional[Generator[str]]
 
     def __init__(self,
                  filep: str,
                  saveto: Optional[str] = None,
                  save_back: bool = False,
                  mapfn: Callable[..., Any] = identity,
-                 sortfn: Callable[..., Any] = identity) -> None: pass
+                 sortfn: Callable[..., Any] = identity,
+                 external: bool = False,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                 unique: bool = False,
+                 key: Optional[Callable[[str], Any]] = None,
+                 tmpdir: Optional[str] = None) -> None: pass
+
+    def _save_sorted(self, lines: Iterable[str], tmp: str) -> Generator[str]: pass
+
+    def __enter__(self) -> Union[List[Any], Generator[str]]: pass
 
-    def __enter__(self) -> List[Any]: pass
+    def _exit_external(self, exc_type: Any) -> None: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
@@ -1,16 +1,27 @@
 # -*- coding: utf-8 -*-
 
 import csv
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
+from itertools import islice
+from queue import Queue
 
 try:
     import ujson as json
 except ImportError:
     import json
 
-from tabulate import tabulate
+from ..fn import identity
+from .compression import codec_from_extension, open_file
+from .formatters import default_formatter, format_batch, format_output, write_formatted
+from .tables import TABLE_FORMATS, TableWriter, write_table
 
-from .formatters import default_formatter, format_output
+FlushStat = namedtuple('FlushStat', ['file', 'bytes', 'seconds'])
 
 
 def get_accumulator(accu):
@@ -41,29 +52,265 @@ def selected_data(accu, selector):
     return selector(accu)
 
 
+class BackgroundWriter(object):
+    """
+    Write-behind file wrapper. Writes are collected into chunks that are handed to a dedicated writer thread
+    through a bounded queue, so the producer only blocks on disk when queue_size chunks are already waiting.
+    An error raised by the writer thread is re-raised by the next write or by close, which waits for
+    every chunk to be written and closes the wrapped file.
+    """
+
+    def __init__(self, out, queue_size=16, chunk_size=1 << 16):
+        """
+        :param out: The file object written to by the writer thread. Closed when the writer is closed
+        :param queue_size: Maximum number of chunks waiting to be written. Defaults to 16
+        :param chunk_size: Number of characters (or bytes) collected before they are handed to the thread.
+        Defaults to 64 KiB
+        """
+        self.out = out
+        self.queue = Queue(maxsize=queue_size)
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.buffered = 0
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='BackgroundWriter', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            # after an error the queue is still drained so the producer is never left blocked
+            if self.error is None:
+                try:
+                    self.out.write(chunk)
+                except BaseException as e:
+                    self.error = e
+
+    def _hand_off(self):
+        if self.buffer:
+            chunk = self.buffer[0] if len(self.buffer) == 1 else self.buffer[0][:0].join(self.buffer)
+            self.buffer = []
+            self.buffered = 0
+            self.queue.put(chunk)
+
+    def write(self, data):
+        """
+        :param data: The string (or bytes) to be written
+        :return: The number of characters (or bytes) written
+        """
+        if self.error is not None:
+            raise self.error
+        if self.closed:
+            raise ValueError('write to closed file')
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.chunk_size:
+            self._hand_off()
+        return len(data)
+
+    def flush(self):
+        """
+        Hands the collected writes to the writer thread without waiting for them to be written
+        """
+        self._hand_off()
+
+    def close(self):
+        """
+        Waits for the writer thread to write every chunk and closes the wrapped file,
+        re-raising the error raised by the writer thread if any
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._hand_off()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+            try:
+                self.out.close()
+            except BaseException:
+                if self.error is None:
+                    raise
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _open_output(file, background=False, queue_size=16):
+    """
+    :return: The file opened for writing, wrapped in a BackgroundWriter if background is True
+    """
+    out = open_file(file, 'w')
+    if background:
+        return BackgroundWriter(out, queue_size=queue_size)
+    return out
+
+
+class StreamAppender(object):
+    """
+    Accumulator for the streaming mode of the savers that formats the items appended to it and writes them
+    to the output through a write buffer, instead of holding them until the saver exits.
+    The buffer is written once it holds buffer_size characters or, if flush_interval is supplied,
+    when an item is appended flush_interval seconds after the last write
+    """
+
+    def __init__(self, out, formatter=default_formatter, buffer_size=1 << 20, flush_interval=None):
+        """
+        :param out: The object written to, i.e. a file object
+        :param formatter: String returning function that will format the items. Defaults to default_formatter
+        :param buffer_size: Number of characters buffered before they are written. Defaults to 1 MiB
+        :param flush_interval: Optional maximum number of seconds between writes
+        """
+        self.out = out
+        self.formatter = formatter
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.buffered = 0
+        self.count = 0
+        self.last_flush = time.monotonic()
+
+    def _buffer(self, formatted, count):
+        """
+        Buffers formatted items, writing the buffer if a threshold is reached
+        """
+        self.buffer.append(formatted)
+        self.buffered += len(formatted)
+        self.count += count
+        if self.buffered >= self.buffer_size:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def append(self, item):
+        """
+        Formats and buffers an item, writing the buffer if a threshold is reached
+        :param item: The item to be saved
+        """
+        self._buffer(format_output(item, self.formatter), 1)
+
+    def extend(self, items, batch_size=4096):
+        """
+        Formats and buffers the items, batch_size at a time using formatters.format_batch
+        :param items: Iterable of the items to be saved
+        :param batch_size: Number of items formatted at a time. Defaults to 4096
+        """
+        items = iter(items)
+        while True:
+            batch = list(islice(items, batch_size))
+            if not batch:
+                return
+            self._buffer(format_batch(batch, self.formatter), len(batch))
+
+    def flush(self):
+        """
+        Writes the buffered items to the output
+        """
+        if self.buffer:
+            self.out.write(''.join(self.buffer))
+            self.buffer.clear()
+            self.buffered = 0
+        self.last_flush = time.monotonic()
+
+    def __len__(self):
+        """
+        :return: The number of items appended
+        """
+        return self.count
+
+
+def _stream_appender(file, formatter, selector, buffer_size, flush_interval, background=False, queue_size=16):
+    """
+    :return: StreamAppender writing to file, after checking the streaming mode can be used
+    """
+    if selector is not None:
+        raise ValueError('A selector needs every item and can not be used in streaming mode')
+    return StreamAppender(_open_output(file, background, queue_size), formatter=formatter,
+                          buffer_size=buffer_size, flush_interval=flush_interval)
+
+
+def _close_appender(appender):
+    try:
+        appender.flush()
+    finally:
+        appender.out.close()
+
+
 @contextmanager
 def auto_saver(filepath, accu=list, formatter=default_formatter,
-               selector=None):
+               selector=None, stream=False, buffer_size=1 << 20, flush_interval=None,
+               background=False, queue_size=16):
     """
     Function version of the class autosavers.AutoSaver
     :param filepath: Path to file to be created with the contents of accu
     :param accu: The data accumulator, i.e. list, dict, your type, etc. Defaults to list
     :param formatter: String returning function that will format the data to be saved to filepath
     :param selector: Optional iterable returning function that has the items to be saved to filepath
+    :param stream: Optional boolean flag indicating a StreamAppender writing the items as they are appended
+    is yielded instead of accu. Defaults to False
+    :param buffer_size: Number of characters buffered before they are written in streaming mode. Defaults to 1 MiB
+    :param flush_interval: Optional maximum number of seconds between writes in streaming mode
+    :param background: Optional boolean flag indicating the file is written by a BackgroundWriter thread.
+    Defaults to False
+    :param queue_size: Maximum number of chunks waiting for the background writer. Defaults to 16
     :return:
     """
     if filepath is None:
         raise ValueError('The file argument was not supplied')
 
+    if stream:
+        appender = _stream_appender(filepath, formatter, selector, buffer_size, flush_interval,
+                                    background, queue_size)
+        try:
+            yield appender
+        finally:
+            _close_appender(appender)
+        return
+
     to_serialize = get_accumulator(accu)
 
     yield to_serialize
 
     outl = selected_data(to_serialize, selector)
 
-    with open(filepath, 'w') as out:
-        for it in outl:
-            out.write(format_output(it, formatter))
+    with _open_output(filepath, background, queue_size) as out:
+        write_formatted(out, outl, formatter)
+
+
+@contextmanager
+def auto_sharded(file, shards=None, key=None, max_lines=None, max_size=None,
+                 formatter=default_formatter, buffer_size=1 << 18, background=False):
+    """
+    Function version of the class autosavers.AutoSaveSharded
+    :param file: Path the shard file names are derived from, i.e. out/urls.txt becomes out/urls-00000.txt
+    :param shards: Number of shards items are hash partitioned into
+    :param key: Optional function returning the value an item is partitioned by. Defaults to the item
+    :param max_lines: Maximum number of items written to a shard before rolling over to the next
+    :param max_size: Maximum number of characters written to a shard before rolling over to the next
+    :param formatter: String returning function that will format the items. Defaults to default_formatter
+    :param buffer_size: Number of characters buffered per shard before they are written. Defaults to 256 KiB
+    :param background: Optional boolean flag indicating each shard is written by a BackgroundWriter thread
+    :return: The AutoSaveSharded to append items to
+    """
+    saver = AutoSaveSharded(file, shards=shards, key=key, max_lines=max_lines, max_size=max_size,
+                            formatter=formatter, buffer_size=buffer_size, background=background)
+    saver.__enter__()
+    try:
+        yield saver
+    except BaseException as e:
+        saver.__exit__(type(e), e, e.__traceback__)
+        raise
+    else:
+        saver.__exit__(None, None, None)
 
 
 @contextmanager
@@ -72,7 +319,7 @@ def auto_save2(filep1, filep2, accu1=list, accu2=list,
                formater2=default_formatter,
                selector1=None, selector2=None):
     """
-    Function version of the class autosavers.AutoSaveTwo
+    Function version of the class autosavers.AutoSaveTwo, the two files are written concurrently
     :param filep1: Path to file to be created with the contents of accu1
     :param filep2: Path to file to be created with the contents of accu2
     :param accu1: The data accumulator for filep1, i.e. list, dict, your type, etc. Defaults to list
@@ -91,20 +338,13 @@ def auto_save2(filep1, filep2, accu1=list, accu2=list,
     elif filep2 is None:
         raise ValueError('The file argument fp2 was not supplied')
 
-    to_serialize1 = get_accumulator(accu1)
-    to_serialize2 = get_accumulator(accu2)
-
-    yield to_serialize1, to_serialize2
+    savers = AutoSaveMany(
+        (AutoSaver, dict(file=filep1, accu=accu1, formatter=formater1, selector=selector1)),
+        (AutoSaver, dict(file=filep2, accu=accu2, formatter=formater2, selector=selector2)))
 
-    outl = selected_data(to_serialize1, selector1)
-    with open(filep1, 'w') as out:
-        for it in outl:
-            out.write(format_output(it, formater1))
+    yield savers.__enter__()
 
-    outl2 = selected_data(to_serialize2, selector2)
-    with open(filep2, 'w') as out:
-        for it in outl2:
-            out.write(format_output(it, formater2))
+    savers.__exit__(None, None, None)
 
 
 @contextmanager
@@ -117,14 +357,14 @@ def auto_csv(file, fieldnames):
     """
     accu = list()
     yield accu
-    with open(file, 'w') as out:
+    with open_file(file, 'w') as out:
         writer = csv.DictWriter(out, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(accu)
 
 
 @contextmanager
-def auto_latextbl(file, headers, accu=list):
+def auto_latextbl(file, headers, accu=list, tablefmt='latex', align=True):
     """
     Function version of the class autosavers.AutoSLatexTable
     :param file: Path to latex table file to be created
@@ -133,14 +373,15 @@ def auto_latextbl(file, headers, accu=list):
     options and formats. The value for this argument is dependant on accu
     and its format.
     :param accu: The data accumulator that is a list or dict. Defaults to list
+    :param tablefmt: The table format, latex, csv and markdown are streamed by tables.write_table
+    and the other tabulate formats written using tabulate. Defaults to latex
+    :param align: Optional boolean flag indicating the columns are aligned. Defaults to True
     :return: accumulator to put data in
     """
     serialize = get_accumulator(accu)
     yield serialize
-    with open(file, 'w') as out:
-        out.write(
-            tabulate(serialize, headers=headers, tablefmt='latex')
-        )
+    with open_file(file, 'w') as out:
+        write_table(out, serialize, headers=headers, tablefmt=tablefmt, align=align)
 
 
 class AutoSaver(object):
@@ -148,11 +389,24 @@ class AutoSaver(object):
     Utility context class that will save the contents of stype to a file.
     Customization of the format for each item to be saved is done through formatter.
     Customization/Selection of the items to be saved to file is done by selector.
+
+    In streaming mode a StreamAppender is returned instead of the accumulator, the items appended to it
+    are formatted and written as they arrive so memory stays bounded and the items already written
+    are kept if the with block raises. Selectors need every item so they can not be used in streaming mode.
+
+    With background=True the file is written by a BackgroundWriter thread, overlapping formatting and disk I/O.
+
+    Example:
+        with AutoSaver('urls.txt', stream=True) as out:
+            for url in crawl():
+                out.append(url)
     """
 
     def __init__(self, file, accu=list,
                  formatter=default_formatter,
-                 selector=None):
+                 selector=None, stream=False,
+                 buffer_size=1 << 20, flush_interval=None,
+                 background=False, queue_size=16):
         """
         :param file: Path to file to be created with the contents of save_type
         :type file: str
@@ -160,36 +414,121 @@ class AutoSaver(object):
         :param formatter: String returning function that will format the data to be saved to file
         Defaults to default_formatter
         :param selector: Optional iterable returning function that has the items to be saved to file
+        :param stream: Optional boolean flag indicating the streaming mode is used. Defaults to False
+        :param buffer_size: Number of characters buffered before they are written in streaming mode.
+        Defaults to 1 MiB
+        :param flush_interval: Optional maximum number of seconds between writes in streaming mode
+        :param background: Optional boolean flag indicating the file is written by a BackgroundWriter thread.
+        Defaults to False
+        :param queue_size: Maximum number of chunks waiting for the background writer. Defaults to 16
         """
         if file is None:
             raise ValueError('The file argument was not supplied')
+        if stream and selector is not None:
+            raise ValueError('A selector needs every item and can not be used in streaming mode')
         self.file = file
-        self.accumulator = get_accumulator(accu)
+        self.accumulator = None if stream else get_accumulator(accu)
         self.formatter = formatter
         self.selector = selector
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self.queue_size = queue_size
 
     def __enter__(self):
         """
-        :return: The accumulator
+        :return: The accumulator, or the StreamAppender in streaming mode
         """
+        if self.stream:
+            self.accumulator = _stream_appender(self.file, self.formatter, self.selector,
+                                                self.buffer_size, self.flush_interval,
+                                                self.background, self.queue_size)
         return self.accumulator
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.stream:
+            _close_appender(self.accumulator)
+            return
         if self.selector is None:
             outl = self.accumulator
         else:
             outl = self.selector(self.accumulator)
-        with open(self.file, 'w') as out:
-            for it in outl:
-                formatted = self.formatter(it)
-                if not formatted.endswith('\n'):
-                    formatted = formatted + '\n'
-                out.write(formatted)
+        with _open_output(self.file, self.background, self.queue_size) as out:
+            write_formatted(out, outl, self.formatter)
+
+
+class AutoSaveMany(object):
+    """
+    Utility context class that uses any number of the AutoSaver classes in this module.
+    On exit every saver writes its file concurrently on a pool of threads, so the exit takes as long as
+    the slowest file rather than the sum of them. Every saver is exited, closing its file, even if another fails,
+    after which the first failure is re-raised. The bytes written to and time taken by each file
+    are available as stats, a list of FlushStat.
+    For more information see each the documentation of the AutoSaver classes in this module
+
+    Example:
+        with AutoSaveMany((AutoSaver, dict(file='urls.txt')),
+                          (AutoSaveJson, dict(file='meta.json'))) as (urls, meta):
+            ...
+    """
+
+    def __init__(self, *savers, workers=None):
+        """
+        :param savers: Tuples of the class reference to an autosaver and the dictionary of arguments supplied to it
+        :param workers: Optional number of threads writing files. Defaults to one per saver
+        """
+        if not savers:
+            raise ValueError('Must supply at least one autosaver')
+        self.savers = [autos(**autos_args) for autos, autos_args in savers]
+        self.workers = workers or len(self.savers)
+        self.stats = []
 
+    def __enter__(self):
+        """
+        :return: Tuple of the accumulators of the savers
+        """
+        entered = []
+        try:
+            for saver in self.savers:
+                entered.append(saver.__enter__())
+        except BaseException as e:
+            for saver in self.savers[:len(entered)]:
+                try:
+                    saver.__exit__(type(e), e, e.__traceback__)
+                except BaseException:
+                    pass
+            raise
+        return tuple(entered)
+
+    @staticmethod
+    def _flush(saver, exc_type, exc_val, exc_tb):
+        """
+        Exits the saver, writing its file
+        :return: The FlushStat of the saver
+        """
+        start = time.perf_counter()
+        saver.__exit__(exc_type, exc_val, exc_tb)
+        elapsed = time.perf_counter() - start
+        file = getattr(saver, 'file', None)
+        size = os.path.getsize(file) if file is not None and os.path.exists(file) else None
+        return FlushStat(file, size, elapsed)
 
-class AutoSaveTwo(object):
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._flush, saver, exc_type, exc_val, exc_tb) for saver in self.savers]
+            error = None
+            for future in as_completed(futures):
+                if error is None and future.exception() is not None:
+                    error = future.exception()
+        self.stats = [future.result() for future in futures if future.exception() is None]
+        if error is not None:
+            raise error
+
+
+class AutoSaveTwo(AutoSaveMany):
     """
-    Utility context class that uses two of the AutoSaver classes in this module
+    Utility context class that uses two of the AutoSaver classes in this module, see AutoSaveMany
     For more information see each the documentation of the AutoSaver classes in this module
     """
 
@@ -200,15 +539,162 @@ class AutoSaveTwo(object):
         :param autos2: Class reference to autosaver 2
         :param autos2_args: Dictionary of arguments supplied to autosaver 2
         """
-        self.f = autos1(**autos1_args)
-        self.s = autos2(**autos2_args)
+        super().__init__((autos1, autos1_args), (autos2, autos2_args))
+        self.f, self.s = self.savers
+
+
+def shard_path(file, index, digits=5):
+    """
+    :param file: Path the shard file names are derived from
+    :param index: The shard's index
+    :param digits: Number of digits the index is zero padded to. Defaults to 5
+    :return: Path to the shard, the index is inserted before the file's extension(s), i.e. urls-00003.txt.gz
+    """
+    base, ext = os.path.splitext(file)
+    if codec_from_extension(file) is not None:
+        base, inner = os.path.splitext(base)
+        ext = inner + ext
+    return '%s-%0*d%s' % (base, digits, index, ext)
+
+
+def manifest_path(file):
+    """
+    :param file: Path the shard file names are derived from
+    :return: Path to the manifest of the shards, i.e. urls.manifest.json
+    """
+    base = os.path.splitext(file)[0]
+    if codec_from_extension(file) is not None:
+        base = os.path.splitext(base)[0]
+    return '%s.manifest.json' % base
+
+
+class AutoSaveSharded(object):
+    """
+    Utility context class that streams items into several shard files so they can be processed in parallel.
+    Items are either hash partitioned into a fixed number of shards by key (crc32, stable across runs and
+    processes) or written to one shard at a time, rolling over to the next once max_lines items or max_size
+    characters were written to it. Shards are named after file with a zero padded index, see shard_path.
+    On exit a json manifest listing each shard's file name, record count and size in bytes is written
+    next to the shards, see manifest_path. Its complete field is false if the with block raised.
+
+    Example:
+        with AutoSaveSharded('out/urls.txt', shards=16, key=domain) as out:
+            for url in crawl():
+                out.append(url)
+    """
+
+    def __init__(self, file, shards=None, key=None, max_lines=None, max_size=None,
+                 formatter=default_formatter, buffer_size=1 << 18, background=False):
+        """
+        :param file: Path the shard file names are derived from, i.e. out/urls.txt becomes out/urls-00000.txt
+        :param shards: Number of shards items are hash partitioned into
+        :param key: Optional function returning the value an item is partitioned by. Defaults to the item
+        :param max_lines: Maximum number of items written to a shard before rolling over to the next
+        :param max_size: Maximum number of characters written to a shard before rolling over to the next
+        :param formatter: String returning function that will format the items. Defaults to default_formatter
+        :param buffer_size: Number of characters buffered per shard before they are written. Defaults to 256 KiB
+        :param background: Optional boolean flag indicating each shard is written by a BackgroundWriter thread
+        """
+        if file is None:
+            raise ValueError('The file argument was not supplied')
+        rollover = max_lines is not None or max_size is not None
+        if shards is None and not rollover:
+            raise ValueError('Must supply either the number of shards or a max_lines or max_size to roll over at')
+        if shards is not None and rollover:
+            raise ValueError('Hash partitioning (shards) and rolling over (max_lines, max_size) are exclusive')
+        if shards is not None and shards < 1:
+            raise ValueError('shards must be at least 1')
+        self.file = file
+        self.shards = shards
+        self.key = key
+        self.max_lines = max_lines
+        self.max_size = max_size
+        self.formatter = formatter
+        self.buffer_size = buffer_size
+        self.background = background
+        self.appenders = []
+        self.records = []
+        self.sizes = []
+
+    def _open_shard(self):
+        path = shard_path(self.file, len(self.appenders))
+        self.appenders.append(StreamAppender(_open_output(path, self.background), formatter=identity,
+                                             buffer_size=self.buffer_size))
+        self.records.append(0)
+        self.sizes.append(0)
 
     def __enter__(self):
-        return self.f.__enter__(), self.s.__enter__()
+        """
+        :return: The sharded saver, items are added to it using append and extend
+        """
+        directory = os.path.dirname(self.file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for _ in range(self.shards or 1):
+            self._open_shard()
+        return self
+
+    def append(self, item):
+        """
+        Formats and writes an item to its shard
+        :param item: The item to be saved
+        """
+        formatted = format_output(item, self.formatter)
+        if self.shards is not None:
+            value = item if self.key is None else self.key(item)
+            if not isinstance(value, bytes):
+                value = str(value).encode('utf-8')
+            shard = zlib.crc32(value) % self.shards
+        else:
+            shard = len(self.appenders) - 1
+            if self.records[shard] and (
+                    (self.max_lines is not None and self.records[shard] >= self.max_lines) or
+                    (self.max_size is not None and self.sizes[shard] + len(formatted) > self.max_size)):
+                _close_appender(self.appenders[shard])
+                self._open_shard()
+                shard += 1
+        self.appenders[shard].append(formatted)
+        self.records[shard] += 1
+        self.sizes[shard] += len(formatted)
+
+    def extend(self, items):
+        """
+        Formats and writes each item to its shard
+        :param items: Iterable of the items to be saved
+        """
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        """
+        :return: The number of items written
+        """
+        return sum(self.records)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.f.__exit__(exc_type, exc_val, exc_tb)
-        self.s.__exit__(exc_type, exc_val, exc_tb)
+        error = None
+        for appender in self.appenders:
+            if appender.out.closed:
+                continue
+            try:
+                _close_appender(appender)
+            except BaseException as e:
+                if error is None:
+                    error = e
+        manifest = {
+            'partition': 'hash' if self.shards is not None else 'rollover',
+            'complete': exc_type is None and error is None,
+            'shards': [
+                {'file': os.path.basename(shard_path(self.file, i)),
+                 'records': records,
+                 'bytes': os.path.getsize(shard_path(self.file, i))}
+                for i, records in enumerate(self.records)
+            ],
+        }
+        with open(manifest_path(self.file), 'w') as out:
+            out.write(json.dumps(manifest))
+        if error is not None:
+            raise error
 
 
 class AutoSaveCsv(object):
@@ -216,16 +702,21 @@ class AutoSaveCsv(object):
     Utility context class for csv.DictWriter.
     """
 
-    def __init__(self, file, fieldnames):
+    def __init__(self, file, fieldnames, background=False, queue_size=16):
         """
         :param file: Path to csv file to be created
         :param fieldnames: List of column names
+        :param background: Optional boolean flag indicating the file is written by a BackgroundWriter thread.
+        Defaults to False
+        :param queue_size: Maximum number of chunks waiting for the background writer. Defaults to 16
         """
         if file is None:
             raise ValueError('The file argument was not supplied')
         self.accu = list()
         self.file = file
         self.fieldnames = fieldnames
+        self.background = background
+        self.queue_size = queue_size
 
     def __enter__(self):
         """
@@ -235,60 +726,236 @@ class AutoSaveCsv(object):
         return self.accu
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        with open(self.file, 'w') as out:
+        with _open_output(self.file, self.background, self.queue_size) as out:
             writer = csv.DictWriter(out, fieldnames=self.fieldnames)
             writer.writeheader()
             writer.writerows(self.accu)
 
 
+JSON_MODES = ('document', 'lines', 'array')
+
+
+def _json_dumps(encoder):
+    """
+    :param encoder: Optional json.JSONEncoder instance or function serializing a value to a json string
+    :return: Function serializing a value to a json string, json.dumps (ujson when available) if encoder is None
+    """
+    if encoder is None:
+        return json.dumps
+    return getattr(encoder, 'encode', encoder)
+
+
+class JsonAppender(object):
+    """
+    Accumulator for the json lines and array modes of AutoSaveJson that serializes the items appended to it
+    batch_size at a time and writes each batch, so at most one batch of items is held in memory.
+    In lines mode each item is written on its own line, in array mode the items are written as one json array
+    """
+
+    def __init__(self, out, mode='lines', encoder=None, batch_size=1000):
+        """
+        :param out: The object written to, i.e. a file object
+        :param mode: The output mode, lines or array. Defaults to lines
+        :param encoder: Optional shared json.JSONEncoder instance or function serializing a value to a json string.
+        Defaults to json.dumps, using ujson when available
+        :param batch_size: Number of items serialized at a time. Defaults to 1000
+        """
+        if mode not in ('lines', 'array'):
+            raise ValueError('The mode must be lines or array not %r' % mode)
+        self.out = out
+        self.mode = mode
+        self.dumps = _json_dumps(encoder)
+        self.batch_size = batch_size
+        self.batch = []
+        self.count = 0
+        if mode == 'array':
+            out.write('[')
+
+    def append(self, item):
+        """
+        :param item: The item to be saved
+        """
+        self.batch.append(item)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def extend(self, items):
+        """
+        :param items: Iterable of the items to be saved
+        """
+        if isinstance(items, (list, tuple)):
+            self.flush()
+            for i in range(0, len(items), self.batch_size):
+                self.batch = list(items[i:i + self.batch_size])
+                self.flush()
+        else:
+            for item in items:
+                self.append(item)
+
+    def flush(self):
+        """
+        Serializes and writes the batched items
+        """
+        batch = self.batch
+        if not batch:
+            return
+        self.batch = []
+        if self.mode == 'lines':
+            self.out.write('\n'.join(map(self.dumps, batch)))
+            self.out.write('\n')
+        else:
+            if self.count:
+                self.out.write(',')
+            # the serialized batch without its brackets
+            self.out.write(self.dumps(batch)[1:-1])
+        self.count += len(batch)
+
+    def close(self):
+        """
+        Writes the remaining items, ends the array in array mode and closes the output
+        """
+        try:
+            self.flush()
+            if self.mode == 'array':
+                self.out.write(']')
+        finally:
+            self.out.close()
+
+    def __len__(self):
+        """
+        :return: The number of items appended
+        """
+        return self.count + len(self.batch)
+
+
 class AutoSaveJson(object):
     """
     Utility context class for saving data as json.
+
+    The mode controls the output:
+        document: the accumulator is saved as one json document (the default)
+        lines: each item of the accumulator is saved on its own line (json lines)
+        array: the items of the accumulator are saved as a json array serialized batch_size items at a time
+    In the lines and array modes the items are serialized incrementally so the whole document is never
+    built in memory, and with stream=True a JsonAppender writing the items as they are appended
+    is returned instead of the accumulator.
+
+    Example:
+        with AutoSaveJson('records.jsonl', mode='lines', stream=True) as out:
+            for record in crawl():
+                out.append(record)
     """
 
-    def __init__(self, file, accu=list):
+    def __init__(self, file, accu=list, background=False, queue_size=16,
+                 mode='document', encoder=None, stream=False, batch_size=1000):
         """
         :param file: Path to json file to be created
         :param accu: Data accumulator. Defaults to list
+        :param background: Optional boolean flag indicating the file is written by a BackgroundWriter thread,
+        lists and tuples are then serialized in batches of items that are written while the next is serialized.
+        Defaults to False
+        :param queue_size: Maximum number of chunks waiting for the background writer. Defaults to 16
+        :param mode: The output mode, document, lines or array. Defaults to document
+        :param encoder: Optional shared json.JSONEncoder instance or function serializing a value to a json string.
+        Defaults to json.dumps, using ujson when available
+        :param stream: Optional boolean flag indicating a JsonAppender is returned, lines and array modes only.
+        Defaults to False
+        :param batch_size: Number of items serialized at a time in the lines and array modes. Defaults to 1000
         """
         if file is None:
             raise ValueError('The file argument was not supplied')
-        self.accu = get_accumulator(accu)
+        if mode not in JSON_MODES:
+            raise ValueError('The mode must be one of %s not %r' % (', '.join(JSON_MODES), mode))
+        if stream and mode == 'document':
+            raise ValueError('A json document can not be streamed, use the lines or array mode')
+        self.accu = None if stream else get_accumulator(accu)
         self.file = file
+        self.background = background
+        self.queue_size = queue_size
+        self.mode = mode
+        self.encoder = encoder
+        self.stream = stream
+        self.batch_size = batch_size
+
+    def _appender(self, mode):
+        return JsonAppender(_open_output(self.file, self.background, self.queue_size), mode=mode,
+                            encoder=self.encoder, batch_size=self.batch_size)
 
     def __enter__(self):
         """
-        :return: accumulator to put data in
+        :return: accumulator to put data in, or the JsonAppender when streaming
         """
+        if self.stream:
+            self.accu = self._appender(self.mode)
         return self.accu
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        with open(self.file, 'w') as out:
-            out.write(json.dumps(self.accu))
+        if self.stream:
+            self.accu.close()
+            return
+        mode = self.mode
+        if mode == 'document':
+            if not (self.background and isinstance(self.accu, (list, tuple))):
+                with _open_output(self.file, self.background, self.queue_size) as out:
+                    out.write(_json_dumps(self.encoder)(self.accu))
+                return
+            # a list is the same document as an array serialized in batches
+            mode = 'array'
+        appender = self._appender(mode)
+        try:
+            appender.extend(self.accu)
+        finally:
+            appender.close()
 
 
 class AutoSLatexTable(object):
     """
-    Utility context class for tabulate.tabulate.
+    Utility context class for writing tables, laid out like tabulate.tabulate.
+    The latex, csv and markdown formats are written row by row by tables.write_table, the column widths
+    computed in a single pass over the rows or not at all when align is False.
+    Other formats are written using tabulate.
+
+    With stream=True a tables.TableWriter is returned instead of the accumulator and each row is written
+    as it is appended, unaligned, so the rows are never held in memory.
     """
 
-    def __init__(self, file, headers, accu=list):
+    def __init__(self, file, headers, accu=list, tablefmt='latex', align=True, stream=False):
         """
         :param file: Path to latex table file to be created
         :param headers: List of table headers
+        :param accu: The data accumulator that is a list or dict. Defaults to list
+        :param tablefmt: The table format. Defaults to latex
+        :param align: Optional boolean flag indicating the columns are aligned. Defaults to True
+        :param stream: Optional boolean flag indicating the rows are written as they are appended,
+        latex, csv and markdown only. Defaults to False
         """
-        self.accu = get_accumulator(accu)
+        if stream and tablefmt not in TABLE_FORMATS:
+            raise ValueError('Only the %s tables can be streamed' % ', '.join(TABLE_FORMATS))
+        if stream and isinstance(headers, str):
+            raise ValueError('The headers of a streamed table must be a list')
+        self.accu = None if stream else get_accumulator(accu)
         self.file = file
         self.headers = headers
+        self.tablefmt = tablefmt
+        self.align = align
+        self.stream = stream
+        self.out = None
 
     def __enter__(self):
         """
-        :return: The data accumulator
+        :return: The data accumulator, or the TableWriter when streaming
         """
+        if self.stream:
+            self.out = open_file(self.file, 'w')
+            self.accu = TableWriter(self.out, headers=self.headers, tablefmt=self.tablefmt)
         return self.accu
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        with open(self.file, 'w') as out:
-            out.write(
-                tabulate(self.accu, headers=self.headers, tablefmt='latex')
-            )
+        if self.stream:
+            try:
+                self.accu.end()
+            finally:
+                self.out.close()
+            return
+        with open_file(self.file, 'w') as out:
+            write_table(out, self.accu, headers=self.headers, tablefmt=self.tablefmt, align=self.align)
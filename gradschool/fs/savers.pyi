@@ -2,9 +2,14 @@ from contextlib import contextmanager
 
 from typing import TypeVar, SupportsInt, SupportsFloat, \
     MutableMapping, Iterable, Optional, Callable, Tuple, List, \
-    Dict, Any, Union
+    Dict, Any, Union, IO, AnyStr, Sequence, NamedTuple
+
+from json import JSONEncoder
+from queue import Queue
+from threading import Thread
 
 from .formatters import default_formatter
+from .tables import TableWriter
 
 T = TypeVar('T')
 A = TypeVar('A')
@@ -12,17 +17,108 @@ B = TypeVar('B')
 TblCsvV = Union[str, int, float, SupportsInt, SupportsFloat]
 
 
+class FlushStat(NamedTuple):
+    file: Optional[str]
+    bytes: Optional[int]
+    seconds: float
+
+
 def get_accumulator(accu: T) -> T: pass
 
 
 def selected_data(accu: T, selector: Optional[Callable[..., Iterable]]): pass
 
 
+class BackgroundWriter(object):
+    out: IO[Any]
+    queue: Queue
+    chunk_size: int
+    buffer: List[AnyStr]
+    buffered: int
+    error: Optional[BaseException]
+    closed: bool
+    thread: Thread
+
+    def __init__(self, out: IO[Any], queue_size: int = 16, chunk_size: int = 1 << 16) -> None: pass
+
+    def _run(self) -> None: pass
+
+    def _hand_off(self) -> None: pass
+
+    def write(self, data: AnyStr) -> int: pass
+
+    def flush(self) -> None: pass
+
+    def close(self) -> None: pass
+
+    def __enter__(self) -> BackgroundWriter: pass
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
+
+
+def _open_output(file: str, background: bool = False, queue_size: int = 16) -> Union[IO[str], BackgroundWriter]: pass
+
+
+class StreamAppender(object):
+    out: Union[IO[str], BackgroundWriter]
+    formatter: Callable[..., str]
+    buffer_size: int
+    flush_interval: Optional[float]
+    buffer: List[str]
+    buffered: int
+    count: int
+    last_flush: float
+
+    def __init__(self,
+                 out: Union[IO[str], BackgroundWriter],
+                 formatter: Callable[..., str] = default_formatter,
+                 buffer_size: int = 1 << 20,
+                 flush_interval: Optional[float] = None) -> None: pass
+
+    def _buffer(self, formatted: str, count: int) -> None: pass
+
+    def append(self, item: Any) -> None: pass
+
+    def extend(self, items: Iterable[Any], batch_size: int = 4096) -> None: pass
+
+    def flush(self) -> None: pass
+
+    def __len__(self) -> int: pass
+
+
+def _stream_appender(file: str,
+                     formatter: Callable[..., str],
+                     selector: Optional[Callable[..., Iterable]],
+                     buffer_size: int,
+                     flush_interval: Optional[float],
+                     background: bool = False,
+                     queue_size: int = 16) -> StreamAppender: pass
+
+
+def _close_appender(appender: StreamAppender) -> None: pass
+
+
 @contextmanager
 def auto_saver(filepath: str,
                stype: T = list,
                formatter: Callable[..., str] = default_formatter,
-               selector: Optional[Callable[..., Iterable]] = None) -> T: pass
+               selector: Optional[Callable[..., Iterable]] = None,
+               stream: bool = False,
+               buffer_size: int = 1 << 20,
+               flush_interval: Optional[float] = None,
+               background: bool = False,
+               queue_size: int = 16) -> Union[T, StreamAppender]: pass
+
+
+@contextmanager
+def auto_sharded(file: str,
+                 shards: Optional[int] = None,
+                 key: Optional[Callable[[Any], Any]] = None,
+                 max_lines: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 formatter: Callable[..., str] = default_formatter,
+                 buffer_size: int = 1 << 18,
+                 background: bool = False) -> AutoSaveSharded: pass
 
 
 @contextmanager
@@ -43,25 +139,54 @@ def auto_csv(file: str, fieldnames: List[str]) -> List[MutableMapping[TblCsvV, T
 @contextmanager
 def auto_latextbl(file: str,
                   headers: Union[str, List[TblCsvV]],
-                  accu: T = list) -> T: pass
+                  accu: T = list,
+                  tablefmt: str = 'latex',
+                  align: bool = True) -> T: pass
 
 
 class AutoSaver(object):
     file: str
-    accumulator: T
+    accumulator: Union[T, StreamAppender, None]
     formatter: Callable[..., str]
     selector: Optional[Callable[..., Iterable]]
+    stream: bool
+    buffer_size: int
+    flush_interval: Optional[float]
+    background: bool
+    queue_size: int
 
     def __init__(self,
                  file: str,
                  accu: T = list,
                  formatter: Callable[..., str] = default_formatter,
-                 selector: Optional[Callable[..., Iterable]] = None) -> None: pass
+                 selector: Optional[Callable[..., Iterable]] = None,
+                 stream: bool = False,
+                 buffer_size: int = 1 << 20,
+                 flush_interval: Optional[float] = None,
+                 background: bool = False,
+                 queue_size: int = 16) -> None: pass
+
+    def __enter__(self) -> Union[T, StreamAppender]: pass
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
+
 
-    def __enter__(self) -> T: pass
+class AutoSaveMany(object):
+    savers: List[Any]
+    workers: int
+    stats: List[FlushStat]
 
+    def __init__(self, *savers: Tuple[Callable[..., Any], Dict[str, Any]], workers: Optional[int] = None) -> None: pass
 
-class AutoSaveTwo(object):
+    def __enter__(self) -> Tuple[Any, ...]: pass
+
+    @staticmethod
+    def _flush(saver: Any, exc_type: Any, exc_val: Any, exc_tb: Any) -> FlushStat: pass
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
+
+
+class AutoSaveTwo(AutoSaveMany):
     f: A
     s: B
 
@@ -71,7 +196,45 @@ class AutoSaveTwo(object):
                  autos2: Callable[..., B],
                  autos2_args: Dict[str, Any]) -> None: pass
 
-    def __enter__(self) -> Tuple[Any, Any]: pass
+
+def shard_path(file: str, index: int, digits: int = 5) -> str: pass
+
+
+def manifest_path(file: str) -> str: pass
+
+
+class AutoSaveSharded(object):
+    file: str
+    shards: Optional[int]
+    key: Optional[Callable[[Any], Any]]
+    max_lines: Optional[int]
+    max_size: Optional[int]
+    formatter: Callable[..., str]
+    buffer_size: int
+    background: bool
+    appenders: List[StreamAppender]
+    records: List[int]
+    sizes: List[int]
+
+    def __init__(self,
+                 file: str,
+                 shards: Optional[int] = None,
+                 key: Optional[Callable[[Any], Any]] = None,
+                 max_lines: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 formatter: Callable[..., str] = default_formatter,
+                 buffer_size: int = 1 << 18,
+                 background: bool = False) -> None: pass
+
+    def _open_shard(self) -> None: pass
+
+    def __enter__(self) -> AutoSaveSharded: pass
+
+    def append(self, item: Any) -> None: pass
+
+    def extend(self, items: Iterable[Any]) -> None: pass
+
+    def __len__(self) -> int: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
 
@@ -80,35 +243,91 @@ class AutoSaveCsv(object):
     accu: List[MutableMapping[TblCsvV, TblCsvV]]
     file: str
     fieldnames: List[str]
+    background: bool
+    queue_size: int
 
-    def __init__(self, file: str, fieldnames: List[str]) -> None: pass
+    def __init__(self, file: str, fieldnames: List[str], background: bool = False, queue_size: int = 16) -> None: pass
 
     def __enter__(self) -> List[MutableMapping[TblCsvV, TblCsvV]]: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
 
 
+JSON_MODES: Tuple[str, ...]
+
+
+def _json_dumps(encoder: Optional[Union[JSONEncoder, Callable[[Any], str]]]) -> Callable[[Any], str]: pass
+
+
+class JsonAppender(object):
+    out: Union[IO[str], BackgroundWriter]
+    mode: str
+    dumps: Callable[[Any], str]
+    batch_size: int
+    batch: List[Any]
+    count: int
+
+    def __init__(self,
+                 out: Union[IO[str], BackgroundWriter],
+                 mode: str = 'lines',
+                 encoder: Optional[Union[JSONEncoder, Callable[[Any], str]]] = None,
+                 batch_size: int = 1000) -> None: pass
+
+    def append(self, item: Any) -> None: pass
+
+    def extend(self, items: Iterable[Any]) -> None: pass
+
+    def flush(self) -> None: pass
+
+    def close(self) -> None: pass
+
+    def __len__(self) -> int: pass
+
+
 class AutoSaveJson(object):
-    accu: T
+    accu: Union[T, JsonAppender, None]
     file: str
+    background: bool
+    queue_size: int
+    mode: str
+    encoder: Optional[Union[JSONEncoder, Callable[[Any], str]]]
+    stream: bool
+    batch_size: int
 
-    def __init__(self, file: str, accu: T = list) -> None: pass
+    def __init__(self,
+                 file: str,
+                 accu: T = list,
+                 background: bool = False,
+                 queue_size: int = 16,
+                 mode: str = 'document',
+                 encoder: Optional[Union[JSONEncoder, Callable[[Any], str]]] = None,
+                 stream: bool = False,
+                 batch_size: int = 1000) -> None: pass
 
-    def __enter__(self) -> T: pass
+    def _appender(self, mode: str) -> JsonAppender: pass
+
+    def __enter__(self) -> Union[T, JsonAppender]: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
 
 
 class AutoSLatexTable(object):
-    accu: T
+    accu: Union[T, TableWriter, None]
     file: str
     headers: Union[str, List[TblCsvV]]
+    tablefmt: str
+    align: bool
+    stream: bool
+    out: Optional[IO[str]]
 
     def __init__(self,
                  file: str,
                  headers: Union[str, List[TblCsvV]],
-                 accu: T = list) -> None: pass
+                 accu: T = list,
+                 tablefmt: str = 'latex',
+                 align: bool = True,
+                 stream: bool = False) -> None: pass
 
-    def __enter__(self) -> T: pass
+    def __enter__(self) -> Union[T, TableWriter]: pass
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
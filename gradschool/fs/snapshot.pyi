@@ -0,0 +1,45 @@
+from struct import Struct
+from typing import Any, Dict, Generator, Iterable, NamedTuple, Optional, Tuple
+
+EntryRecord = Tuple[bool, int, int, int]
+SnapshotIndex = Dict[str, Tuple[int, bytes]]
+
+SnapshotChange = NamedTuple(
+    'SnapshotChange', [
+        ('kind', str), ('path', str), ('is_dir', bool), ('size', int), ('mtime_ns', int), ('inode', int)])
+
+ADDED: str
+MODIFIED: str
+DELETED: str
+_ENTRY: Struct
+
+
+def _pack_entries(entries: Iterable[Tuple[str, EntryRecord]]) -> bytes: pass
+
+
+def _unpack_entries(packed: bytes, dirs_only: bool = False) -> Generator[Tuple[str, EntryRecord]]: pass
+
+
+class DirSnapshot(object):
+    root: str
+    indexp: str
+    trust_dir_mtime: bool
+    index: SnapshotIndex
+    new_index: Optional[SnapshotIndex]
+
+    def __init__(self, root: str, indexp: str, trust_dir_mtime: bool = True) -> None: pass
+
+    def _full_path(self, rel: str) -> str: pass
+
+    def _deleted_tree(self, rel: str, name: str, record: EntryRecord) -> Generator[SnapshotChange]: pass
+
+    def changes(self) -> Generator[SnapshotChange]: pass
+
+    def save(self) -> None: pass
+
+    def __enter__(self) -> Generator[SnapshotChange]: pass
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: pass
+
+
+def snapshot_changes(root: str, indexp: str, trust_dir_mtime: bool = True) -> Generator[SnapshotChange]: pass
@@ -0,0 +1,335 @@
+import csv
+import math
+from itertools import chain, zip_longest
+
+from tabulate import tabulate
+
+TABLE_FORMATS = ('latex', 'csv', 'markdown', 'pipe')
+
+_LATEX_ESCAPES = str.maketrans({
+    '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_', '^': r'\^{}', '{': r'\{', '}': r'\}',
+    '~': r'\textasciitilde{}', '\\': r'\textbackslash{}', '<': r'\ensuremath{<}', '>': r'\ensuremath{>}',
+})
+
+# headers are padded like tabulate's
+_HEADER_PADDING = 2
+
+
+# the types a column can have from the least to the most generic, like tabulate's
+_COLUMN_TYPES = (type(None), bool, int, float, str)
+_TYPE_RANK = {t: i for i, t in enumerate(_COLUMN_TYPES)}
+
+
+def _is_float(value):
+    """
+    :return: True if float parses the value and it is not an overflow to inf or nan, like tabulate's _isnumber
+    """
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return False
+    if isinstance(value, (str, bytes)) and (math.isinf(number) or math.isnan(number)):
+        return value.lower() in ('inf', '-inf', 'nan')
+    return True
+
+
+def _is_int(value):
+    if type(value) is int:
+        return True
+    if isinstance(value, str):
+        try:
+            int(value)
+        except ValueError:
+            return False
+        return True
+    return False
+
+
+def _cell_type(value):
+    """
+    :return: The least generic type of a cell, numbers in strings are parsed like tabulate's
+    """
+    if value is None or (isinstance(value, str) and not value):
+        return type(None)
+    if type(value) is bool or value in ('True', 'False'):
+        return bool
+    if _is_int(value):
+        return int
+    if _is_float(value):
+        return float
+    return str
+
+
+def _cell_text(value, coltype=str):
+    """
+    :return: The text of a table cell formatted for the type of its column like tabulate,
+    None is an empty cell and the numbers of float columns are formatted using g
+    """
+    if value is None:
+        return ''
+    if coltype is float and not (isinstance(value, str) and not value):
+        try:
+            return format(float(value), 'g')
+        except (ValueError, TypeError):
+            pass
+    return str(value)
+
+
+def _after_point(text):
+    """
+    :return: The number of characters after the decimal point (or exponent) of a number, -1 for integers
+    and text, used to line up decimal points like tabulate
+    """
+    if not _is_float(text) or _is_int(text):
+        return -1
+    pos = text.rfind('.')
+    if pos < 0:
+        pos = text.lower().rfind('e')
+    return len(text) - pos - 1 if pos >= 0 else -1
+
+
+def _table_rows(data, headers):
+    """
+    Normalizes the data types tabulate accepts, a list of sequences, a list of dicts or a dict of columns
+    :param data: The table data
+    :param headers: List of headers, keys to use the keys of the dicts or firstrow to use the first row
+    :return: Tuple of the list of headers and an iterator of the rows as sequences
+    """
+    if isinstance(data, dict):
+        keys = list(data.keys())
+        rows = zip_longest(*data.values())
+        return (keys if headers == 'keys' else list(headers or ())), rows
+    rows = iter(data)
+    first = next(rows, None)
+    if first is None:
+        return ([] if headers in ('keys', 'firstrow') else list(headers or ())), iter(())
+    if headers == 'firstrow':
+        return [_cell_text(h) for h in first], rows
+    rows = chain([first], rows)
+    if isinstance(first, dict):
+        keys = list(first.keys())
+        return (keys if headers == 'keys' else list(headers or ())), ([row.get(k) for k in keys] for row in rows)
+    if headers == 'keys':
+        return [str(i) for i in range(len(first))], rows
+    return list(headers or ()), rows
+
+
+def table_layout(rows, headers=()):
+    """
+    Computes the type of each column, its width and the number of characters after its decimal points
+    in a single pass over the rows. As a column's type is only known once every row is seen, the width
+    is tracked for each type the column may still have
+    :param rows: Iterable of the rows as sequences
+    :param headers: Optional list of headers
+    :return: Tuple of the lists of column widths, column types (see tabulate, int and float columns are numeric)
+    and the most characters after a decimal point in the column
+    """
+    header_widths = [len(_cell_text(h)) + _HEADER_PADDING for h in headers]
+    columns = len(header_widths)
+    ranks = [0] * columns
+    text_widths = list(header_widths)
+    # widest integer part and longest fraction of the column formatted as int and as float
+    integral = {int: [0] * columns, float: [0] * columns}
+    decimals = {int: [-1] * columns, float: [-1] * columns}
+    for row in rows:
+        if len(row) > columns:
+            extra = len(row) - columns
+            columns = len(row)
+            for column in (header_widths, ranks, text_widths, integral[int], integral[float]):
+                column.extend([0] * extra)
+            decimals[int].extend([-1] * extra)
+            decimals[float].extend([-1] * extra)
+        for i, value in enumerate(row):
+            typ = _cell_type(value)
+            rank = _TYPE_RANK[typ]
+            if rank > ranks[i]:
+                ranks[i] = rank
+            text = _cell_text(value)
+            if len(text) > text_widths[i]:
+                text_widths[i] = len(text)
+            if typ is type(None) or ranks[i] > _TYPE_RANK[float]:
+                continue
+            for coltype in (int, float):
+                if ranks[i] > _TYPE_RANK[coltype]:
+                    continue
+                text = _cell_text(value, coltype)
+                after = _after_point(text)
+                if after > decimals[coltype][i]:
+                    decimals[coltype][i] = after
+                if len(text) - after > integral[coltype][i]:
+                    integral[coltype][i] = len(text) - after
+    types = [_COLUMN_TYPES[rank] if rank else bool for rank in ranks]
+    widths = []
+    for i, typ in enumerate(types):
+        if typ in (int, float):
+            widths.append(max(header_widths[i], integral[typ][i] + decimals[typ][i]))
+        else:
+            widths.append(text_widths[i])
+    return widths, types, [decimals[typ][i] if typ in (int, float) else -1 for i, typ in enumerate(types)]
+
+
+class TableWriter(object):
+    """
+    Writes a table row by row in the latex, csv or markdown (pipe) format, laid out like tabulate's.
+    With widths the cells are aligned, numeric columns to the right on their decimal points, otherwise they are written unpadded
+    and the type of each column is taken from the first row. Like tabulate the table does not end with a newline
+    """
+
+    def __init__(self, out, headers=(), tablefmt='latex', widths=None, coltypes=None, decimals=None):
+        """
+        :param out: The object written to, i.e. a file object
+        :param headers: Optional list of headers
+        :param tablefmt: The table format, latex, csv or markdown (pipe). Defaults to latex
+        :param widths: Optional list of column widths, see table_layout
+        :param coltypes: Optional list of the column types, see table_layout
+        :param decimals: Optional list of the most characters after a decimal point in each column,
+        see table_layout
+        """
+        if tablefmt not in TABLE_FORMATS:
+            raise ValueError('The table format must be one of %s not %r' % (', '.join(TABLE_FORMATS), tablefmt))
+        self.out = out
+        self.headers = list(headers or ())
+        self.tablefmt = 'markdown' if tablefmt == 'pipe' else tablefmt
+        self.widths = widths
+        self.coltypes = coltypes
+        self.decimals = decimals
+        self.started = False
+        self.count = 0
+        self.csv_writer = csv.writer(out) if self.tablefmt == 'csv' else None
+
+    def _numeric(self, i):
+        return i < len(self.coltypes) and self.coltypes[i] in (int, float)
+
+    def _cells(self, row, header=False):
+        cells = []
+        for i, value in enumerate(row):
+            text = _cell_text(value, str if header or i >= len(self.coltypes) else self.coltypes[i])
+            if self.widths is not None:
+                width = self.widths[i] if i < len(self.widths) else 0
+                if self._numeric(i):
+                    if not header and self.decimals is not None and value is not None:
+                        # pad the fraction so the decimal points line up
+                        text += ' ' * (self.decimals[i] - _after_point(text))
+                    text = text.rjust(width)
+                else:
+                    text = text.ljust(width)
+            cells.append(text)
+        if self.widths is not None:
+            # missing cells are empty
+            for i in range(len(row), len(self.widths)):
+                cells.append(' ' * self.widths[i])
+        if self.tablefmt == 'latex':
+            cells = [c.translate(_LATEX_ESCAPES) for c in cells]
+        return cells
+
+    def _line(self, text):
+        """
+        Writes a line of the table, the newline is written before it so the table does not end with one
+        """
+        self.out.write('\n%s' % text if self.started else text)
+        self.started = True
+
+    def _start(self, first):
+        if self.coltypes is None:
+            columns = max(len(self.headers), len(first) if first is not None else 0)
+            self.coltypes = [_cell_type(first[i]) if first is not None and i < len(first) else str
+                             for i in range(columns)]
+        if self.tablefmt == 'csv':
+            self.started = True
+            if self.headers:
+                self.csv_writer.writerow(self.headers)
+            return
+        if self.tablefmt == 'latex':
+            self._line('\\begin{tabular}{%s}' % ''.join('r' if self._numeric(i) else 'l'
+                                                          for i in range(len(self.coltypes))))
+            self._line('\\hline')
+            if self.headers:
+                self._line(' %s \\\\' % ' & '.join(self._cells(self.headers, header=True)))
+                self._line('\\hline')
+            return
+        if self.headers:
+            self._line('| %s |' % ' | '.join(self._cells(self.headers, header=True)))
+        widths = self.widths if self.widths is not None else [1] * len(self.coltypes)
+        self._line('|%s|' % '|'.join('-' * (w + 1) + ':' if self._numeric(i) else ':' + '-' * (w + 1)
+                                     for i, w in enumerate(widths)))
+
+    def write_row(self, row):
+        """
+        :param row: Sequence of the row's values, or a dict of them keyed by header
+        """
+        if isinstance(row, dict):
+            row = [row.get(h) for h in self.headers]
+        if not self.started:
+            self._start(row)
+        self.count += 1
+        if self.tablefmt == 'csv':
+            self.csv_writer.writerow(row)
+        elif self.tablefmt == 'latex':
+            self._line(' %s \\\\' % ' & '.join(self._cells(row)))
+        else:
+            self._line('| %s |' % ' | '.join(self._cells(row)))
+
+    def append(self, row):
+        """
+        Alias of write_row so the writer can be used as the accumulator of the savers
+        :param row: Sequence of the row's values
+        """
+        self.write_row(row)
+
+    def extend(self, rows):
+        """
+        :param rows: Iterable of the rows as sequences
+        """
+        for row in rows:
+            self.write_row(row)
+
+    def end(self):
+        """
+        Ends the table, writing the latex footer
+        """
+        if not self.started:
+            self._start(None)
+        if self.tablefmt == 'latex':
+            self._line('\\hline')
+            self._line('\\end{tabular}')
+
+    def __len__(self):
+        """
+        :return: The number of rows written
+        """
+        return self.count
+
+
+def write_table(out, data, headers=(), tablefmt='latex', align=True):
+    """
+    Writes a table streaming its rows. For aligned tables the column widths are computed in one pass over the
+    rows before a second pass writes them, so only one formatted row is held in memory at a time.
+    Formats other than latex, csv and markdown (pipe) are written using tabulate
+    :param out: The object written to, i.e. a file object
+    :param data: The table data, a list of sequences, a list of dicts or a dict of columns
+    :param headers: Optional list of headers, keys to use the keys of the dicts or firstrow to use the first row
+    :param tablefmt: The table format. Defaults to latex
+    :param align: Optional boolean flag indicating the cells are padded to align the columns. Defaults to True.
+    Numbers are right aligned on their decimal points like tabulate
+    :return: The number of rows written
+    """
+    if tablefmt not in TABLE_FORMATS:
+        if not isinstance(data, (list, tuple, dict)):
+            data = list(data)
+        out.write(tabulate(data, headers=headers, tablefmt=tablefmt))
+        if isinstance(data, dict):
+            return max((len(column) for column in data.values()), default=0)
+        return len(data) - 1 if headers == 'firstrow' and data else len(data)
+    if tablefmt == 'csv':
+        align = False
+    if align and not isinstance(data, (list, tuple, dict)):
+        data = list(data)
+    columns, rows = _table_rows(data, headers)
+    widths = coltypes = decimals = None
+    if align:
+        widths, coltypes, decimals = table_layout(rows, columns)
+        columns, rows = _table_rows(data, headers)
+    writer = TableWriter(out, headers=columns, tablefmt=tablefmt, widths=widths, coltypes=coltypes, decimals=decimals)
+    writer.extend(rows)
+    writer.end()
+    return len(writer)
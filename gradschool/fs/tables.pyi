@@ -0,0 +1,75 @@
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+TABLE_FORMATS: Tuple[str, ...]
+_LATEX_ESCAPES: Dict[int, str]
+_HEADER_PADDING: int
+_COLUMN_TYPES: Tuple[type, ...]
+_TYPE_RANK: Dict[type, int]
+
+TableData = Union[Sequence[Sequence[Any]], Sequence[Dict[str, Any]], Dict[str, Sequence[Any]], Iterable[Any]]
+
+
+def _is_float(value: Any) -> bool: pass
+
+
+def _is_int(value: Any) -> bool: pass
+
+
+def _cell_type(value: Any) -> type: pass
+
+
+def _cell_text(value: Any, coltype: type = str) -> str: pass
+
+
+def _after_point(text: str) -> int: pass
+
+
+def _table_rows(data: TableData, headers: Union[str, Sequence[Any]]) -> Tuple[List[Any], Iterator[Sequence[Any]]]: pass
+
+
+def table_layout(rows: Iterable[Sequence[Any]], headers: Sequence[Any] = ()) -> Tuple[List[int], List[type], List[int]]: pass
+
+
+class TableWriter(object):
+    out: IO[str]
+    headers: List[Any]
+    tablefmt: str
+    widths: Optional[List[int]]
+    coltypes: Optional[List[type]]
+    decimals: Optional[List[int]]
+    started: bool
+    count: int
+    csv_writer: Any
+
+    def __init__(self,
+                 out: IO[str],
+                 headers: Sequence[Any] = (),
+                 tablefmt: str = 'latex',
+                 widths: Optional[List[int]] = None,
+                 coltypes: Optional[List[type]] = None,
+                 decimals: Optional[List[int]] = None) -> None: pass
+
+    def _numeric(self, i: int) -> bool: pass
+
+    def _cells(self, row: Sequence[Any], header: bool = False) -> List[str]: pass
+
+    def _line(self, text: str) -> None: pass
+
+    def _start(self, first: Optional[Sequence[Any]]) -> None: pass
+
+    def write_row(self, row: Union[Sequence[Any], Dict[Any, Any]]) -> None: pass
+
+    def append(self, row: Union[Sequence[Any], Dict[Any, Any]]) -> None: pass
+
+    def extend(self, rows: Iterable[Union[Sequence[Any], Dict[Any, Any]]]) -> None: pass
+
+    def end(self) -> None: pass
+
+    def __len__(self) -> int: pass
+
+
+def write_table(out: IO[str],
+                data: TableData,
+                headers: Union[str, Sequence[Any]] = (),
+                tablefmt: str = 'latex',
+                align: bool = True) -> int: pass
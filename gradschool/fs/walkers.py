@@ -1,5 +1,9 @@
+import os
+import re
+from fnmatch import translate
 from pathlib import Path
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from ..fn import T
 
@@ -16,7 +20,8 @@ def list_dir(dirpath='.', filterfn=None):
         raise ValueError('Must supply a path to a directory to list')
     dp = Path(dirpath)
     if filterfn is not None:
-        return list_dirf(dirpath, filterfn)
+        yield from list_dirf(dirpath, filterfn)
+        return
     for item in dp.iterdir():
         yield item
 
@@ -39,44 +44,55 @@ def list_dirf(dirpath='.', filterfn=T):
             yield item
 
 
-def rlist_dir(dirpath='.', ffilter=None, dfilter=None):
+def rlist_dir(dirpath='.', ffilter=None, dfilter=None, include=None, exclude=None,
+              max_depth=None, skip_hidden=False):
     """
     Lists the contents of a directory recursively with
     the ability to optionally supply a file and or directory filtering function.
     If no filtering functions are supplied all directories and files are yielded
-    Uses a deque internally. All directories are appended right and popped left.
+    Uses os.scandir and a deque internally. All directories are appended right and popped left.
     :param dirpath: Path to the directory to be listed. Defaults to current working directory
     :param ffilter: Optional file filtering function. If supplied only the files contained within all visited
     directories that the function returns true for will be yielded
     :param dfilter: Optional directory filtering function. If supplied only the directories
     within the initial directory the function returns true for will be visited
+    :param include: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied only the entries whose name matches will be yielded, directories are still visited
+    :param exclude: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied the entries whose name matches are not yielded and the matching directories are not visited
+    :param max_depth: Optional maximum depth to list. The contents of dirpath are at depth 1
+    :param skip_hidden: Optional boolean flag indicating entries whose name starts with a dot are excluded
     :return: Generator yielding the contents of the directory and child directories as pathlib.Path objects
     """
     if dirpath is None:
         raise ValueError(
             'Must supply a path to a directory to recursively list')
     if ffilter is not None or dfilter is not None:
-        return rlist_dirf(dirpath, ffilter=ffilter, dfilter=dfilter)
-    q = deque([Path(dirpath)])
-    while q:
-        cur = q.popleft()
-        for item in cur.iterdir():
-            yield item
-            if item.is_dir():
-                q.append(item)
+        yield from rlist_dirf(dirpath, ffilter=ffilter, dfilter=dfilter, include=include, exclude=exclude,
+                              max_depth=max_depth, skip_hidden=skip_hidden)
+        return
+    yield from _scandir_bfs(dirpath, Path, None, None, include=include, exclude=exclude,
+                            max_depth=max_depth, skip_hidden=skip_hidden)
 
 
-def rlist_dirf(dirpath='.', ffilter=T, dfilter=T):
+def rlist_dirf(dirpath='.', ffilter=T, dfilter=T, include=None, exclude=None,
+               max_depth=None, skip_hidden=False):
     """
     Lists the contents of a directory recursively with
     the ability to supply a file and or directory filtering function.
     If no filtering functions are supplied all directories and files are yielded.
-    Uses a deque internally. All directories are appended right and popped left
+    Uses os.scandir and a deque internally. All directories are appended right and popped left
     :param dirpath: Path to the directory to be listed. Defaults to current working directory
     :param ffilter: File filtering function, only the files contained within all visited
     directories that the function returns true for will be yielded
     :param dfilter: Directory filtering function, only the directories
     within the initial directory the function returns true for will be visited
+    :param include: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied only the entries whose name matches will be yielded, directories are still visited
+    :param exclude: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied the entries whose name matches are not yielded and the matching directories are not visited
+    :param max_depth: Optional maximum depth to list. The contents of dirpath are at depth 1
+    :param skip_hidden: Optional boolean flag indicating entries whose name starts with a dot are excluded
     :return: Generator yielding the contents of the directory and child directories as pathlib.Path objects
     """
     if dirpath is None:
@@ -86,11 +102,298 @@ def rlist_dirf(dirpath='.', ffilter=T, dfilter=T):
         ffilter = T
     if dfilter is None:
         dfilter = T
-    q = deque([Path(dirpath)])
+    yield from _scandir_bfs(dirpath, Path, ffilter, dfilter, include=include, exclude=exclude,
+                            max_depth=max_depth, skip_hidden=skip_hidden)
+
+
+class WalkEntry(object):
+    """
+    Lightweight directory entry yielded by rscandir.
+    Wraps the os.DirEntry produced by os.scandir so that the file type and stat
+    information it caches are reused. The pathlib.Path for the entry is only created when asked for.
+    """
+
+    __slots__ = ('entry', '_path')
+
+    def __init__(self, entry):
+        """
+        :param entry: The os.DirEntry to wrap
+        """
+        self.entry = entry
+        self._path = None
+
+    @property
+    def name(self):
+        """
+        :return: The base name of the entry
+        """
+        return self.entry.name
+
+    @property
+    def path(self):
+        """
+        :return: The entry's path as a string
+        """
+        return self.entry.path
+
+    def is_dir(self, follow_symlinks=True):
+        """
+        :return: True if the entry is a directory. Uses the type cached by os.scandir
+        """
+        return self.entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        """
+        :return: True if the entry is a file. Uses the type cached by os.scandir
+        """
+        return self.entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        """
+        :return: True if the entry is a symbolic link
+        """
+        return self.entry.is_symlink()
+
+    def stat(self, follow_symlinks=True):
+        """
+        :return: The os.stat_result for the entry, cached after the first call
+        """
+        return self.entry.stat(follow_symlinks=follow_symlinks)
+
+    def inode(self):
+        """
+        :return: The inode number of the entry
+        """
+        return self.entry.inode()
+
+    def as_path(self):
+        """
+        :return: The entry as a pathlib.Path, created on first use
+        """
+        if self._path is None:
+            self._path = Path(self.entry.path)
+        return self._path
+
+    def __fspath__(self):
+        return self.entry.path
+
+    def __str__(self):
+        return self.entry.path
+
+    def __repr__(self):
+        return 'WalkEntry(%r)' % self.entry.path
+
+
+_GLOB_CHARS = re.compile(r'[*?[]')
+
+
+def compile_patterns(patterns):
+    """
+    Compiles glob patterns, matched case sensitively against the name of an entry, into a single matching function.
+    Patterns without wildcards become a set lookup, extension patterns (*.html, *.tar.gz) become a single
+    str.endswith call and all remaining patterns are joined into one regular expression.
+    :param patterns: A glob pattern or iterable of glob patterns
+    :return: Function returning true for the names matching any of the patterns. None if patterns is None
+    """
+    if patterns is None:
+        return None
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    names = set()
+    suffixes = []
+    globs = []
+    for pattern in patterns:
+        if _GLOB_CHARS.search(pattern) is None:
+            names.add(pattern)
+        elif pattern.startswith('*.') and _GLOB_CHARS.search(pattern, 1) is None:
+            suffixes.append(pattern[1:])
+        else:
+            globs.append(translate(pattern))
+    names = frozenset(names)
+    suffixes = tuple(suffixes)
+    regex = re.compile('|'.join(globs)).match if globs else None
+
+    def matches(name):
+        return name in names or (suffixes and name.endswith(suffixes)) or \
+            (regex is not None and regex(name) is not None)
+    return matches
+
+
+def _is_hidden(name):
+    return name.startswith('.')
+
+
+def _exclusion(exclude, skip_hidden):
+    """
+    :return: The compiled exclude patterns combined with the hidden name check if skip_hidden is true
+    """
+    excluded = compile_patterns(exclude)
+    if not skip_hidden:
+        return excluded
+    if excluded is None:
+        return _is_hidden
+    return lambda name: _is_hidden(name) or excluded(name)
+
+
+def _scandir_bfs(dirpath, wrap, ffilter, dfilter, include=None, exclude=None,
+                 max_depth=None, skip_hidden=False):
+    """
+    Breadth first os.scandir walk shared by the recursive walkers.
+    The directory check uses the type information cached by os.scandir so no additional
+    stat call is made per entry. The include and exclude patterns are matched against the entry's name
+    before wrap is called, so entries that are filtered out by them never have an item created.
+    :param dirpath: Path to the directory to be listed
+    :param wrap: Function applied to each os.DirEntry to produce the yielded (and filtered) item
+    :param ffilter: Optional filtering function, only the items it returns true for are yielded
+    :param dfilter: Optional directory filtering function, only the directories it returns true for are visited
+    :param include: Optional glob pattern(s), only the entries whose name matches are yielded
+    :param exclude: Optional glob pattern(s), the entries whose name matches are neither yielded nor visited
+    :param max_depth: Optional maximum depth to list. The contents of dirpath are at depth 1
+    :param skip_hidden: Optional boolean flag indicating entries whose name starts with a dot are excluded
+    :return: Generator yielding the wrapped entries
+    """
+    if max_depth is not None and max_depth < 1:
+        raise ValueError('The maximum depth must be at least 1')
+    included = compile_patterns(include)
+    excluded = _exclusion(exclude, skip_hidden)
+    q = deque([(os.fspath(dirpath), 1)])
     while q:
-        cur = q.popleft()
-        for item in cur.iterdir():
-            if ffilter(item):
-                yield item
-            if item.is_dir() and dfilter(item):
-                q.append(item)
+        cur, depth = q.popleft()
+        descend = max_depth is None or depth < max_depth
+        with os.scandir(cur) as it:
+            for entry in it:
+                if excluded is not None and excluded(entry.name):
+                    continue
+                item = None
+                if included is None or included(entry.name):
+                    item = wrap(entry)
+                    if ffilter is None or ffilter(item):
+                        yield item
+                if descend and entry.is_dir():
+                    if dfilter is not None:
+                        if item is None:
+                            item = wrap(entry)
+                        if not dfilter(item):
+                            continue
+                    q.append((entry.path, depth + 1))
+
+
+def rscandir(dirpath='.', ffilter=None, dfilter=None, include=None, exclude=None,
+             max_depth=None, skip_hidden=False):
+    """
+    Lists the contents of a directory recursively using os.scandir with
+    the ability to optionally supply a file and or directory filtering function.
+    Has the same breadth first traversal order and filtering semantics as rlist_dirf but yields
+    WalkEntry objects, which reuse the type and stat information cached by os.scandir,
+    rather than pathlib.Path objects. Use WalkEntry.as_path to get the pathlib.Path for an entry.
+    :param dirpath: Path to the directory to be listed. Defaults to current working directory
+    :param ffilter: Optional filtering function called with a WalkEntry. If supplied only the entries
+    the function returns true for will be yielded
+    :param dfilter: Optional directory filtering function called with a WalkEntry. If supplied only the directories
+    the function returns true for will be visited
+    :param include: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied only the entries whose name matches will be yielded, directories are still visited
+    :param exclude: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied the entries whose name matches are not yielded and the matching directories are not visited
+    :param max_depth: Optional maximum depth to list. The contents of dirpath are at depth 1
+    :param skip_hidden: Optional boolean flag indicating entries whose name starts with a dot are excluded
+    :return: Generator yielding the contents of the directory and child directories as WalkEntry objects
+    """
+    if dirpath is None:
+        raise ValueError(
+            'Must supply a path to a directory to recursively list')
+    yield from _scandir_bfs(dirpath, WalkEntry, ffilter, dfilter, include=include, exclude=exclude,
+                            max_depth=max_depth, skip_hidden=skip_hidden)
+
+
+def _list_entries(dirpath, ordered, excluded):
+    """
+    Lists a single directory for prlist_dir, run by the worker threads
+    :param dirpath: Path to the directory to be listed
+    :param ordered: Should the entries be sorted by name
+    :param excluded: Optional function returning true for the names of the entries to leave out
+    :return: List of (path, name, is directory) tuples for the directory's contents
+    """
+    with os.scandir(dirpath) as it:
+        entries = [(entry.path, entry.name, entry.is_dir()) for entry in it
+                   if excluded is None or not excluded(entry.name)]
+    if ordered:
+        entries.sort()
+    return entries
+
+
+def prlist_dir(dirpath='.', ffilter=None, dfilter=None, workers=8,
+               max_pending=None, ordered=False, include=None, exclude=None,
+               max_depth=None, skip_hidden=False):
+    """
+    Lists the contents of a directory recursively using a pool of worker threads that list
+    directories concurrently, with the ability to optionally supply a file and or directory filtering function.
+    Intended for high latency (network) file systems where each directory listing is a round trip.
+    The filtering functions are called in the thread consuming the generator, never in the worker threads.
+    :param dirpath: Path to the directory to be listed. Defaults to current working directory
+    :param ffilter: Optional file filtering function. If supplied only the files contained within all visited
+    directories that the function returns true for will be yielded
+    :param dfilter: Optional directory filtering function. If supplied only the directories
+    the function returns true for will be visited
+    :param workers: Number of worker threads listing directories. Defaults to 8
+    :param max_pending: Maximum number of directory listings in flight or waiting to be consumed.
+    Bounds the memory used for listings. Defaults to four times workers
+    :param ordered: Yield the entries in a deterministic order. The contents of each directory
+    are sorted by name and directories are consumed in the order they were discovered, giving the same
+    order as a breadth first walk over the sorted listings. Defaults to False, entries are yielded as
+    soon as any listing completes
+    :param include: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied only the entries whose name matches will be yielded, directories are still visited
+    :param exclude: Optional glob pattern or iterable of glob patterns matched against the names of the entries.
+    If supplied the entries whose name matches are not yielded and the matching directories are not visited
+    :param max_depth: Optional maximum depth to list. The contents of dirpath are at depth 1
+    :param skip_hidden: Optional boolean flag indicating entries whose name starts with a dot are excluded
+    :return: Generator yielding the contents of the directory and child directories as pathlib.Path objects
+    """
+    if dirpath is None:
+        raise ValueError(
+            'Must supply a path to a directory to recursively list')
+    if workers < 1:
+        raise ValueError('Must use at least one worker thread')
+    if ffilter is None:
+        ffilter = T
+    if max_pending is None:
+        max_pending = workers * 4
+    max_pending = max(max_pending, 1)
+    if max_depth is not None and max_depth < 1:
+        raise ValueError('The maximum depth must be at least 1')
+    included = compile_patterns(include)
+    excluded = _exclusion(exclude, skip_hidden)
+    waiting = deque([(os.fspath(dirpath), 1)])
+    pending = deque()
+    depths = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while waiting or pending:
+            while waiting and len(pending) < max_pending:
+                cur, depth = waiting.popleft()
+                future = executor.submit(_list_entries, cur, ordered, excluded)
+                depths[future] = depth
+                pending.append(future)
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending = deque(not_done)
+            for future in done:
+                depth = depths.pop(future)
+                descend = max_depth is None or depth < max_depth
+                for path, name, is_dir in future.result():
+                    item = None
+                    if included is None or included(name):
+                        item = Path(path)
+                        if ffilter(item):
+                            yield item
+                    if descend and is_dir:
+                        if dfilter is not None and not dfilter(item if item is not None else Path(path)):
+                            continue
+                        waiting.append((path, depth + 1))
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
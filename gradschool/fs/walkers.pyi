@@ -1,8 +1,11 @@
+import os
 from pathlib import Path
-from typing import Callable, Generator, Optional
+from typing import Any, Callable, Generator, Iterable, List, Optional, Pattern, Tuple, Union
 
 from gradschool.fn import T
 
+Patterns = Union[str, Iterable[str]]
+
 
 def list_dir(dirpath: str = '.',
              filterfn: Optional[Callable[[Path], bool]] = None) -> Generator[Path]: pass
@@ -14,9 +17,92 @@ def list_dirf(dirpath: str = '.',
 
 def rlist_dir(dirpath: str = '.',
               ffilter: Optional[Callable[[Path], bool]] = None,
-              dfilter: Optional[Callable[[Path], bool]] = None) -> Generator[Path]: pass
+              dfilter: Optional[Callable[[Path], bool]] = None,
+              include: Optional[Patterns] = None,
+              exclude: Optional[Patterns] = None,
+              max_depth: Optional[int] = None,
+              skip_hidden: bool = False) -> Generator[Path]: pass
 
 
 def rlist_dirf(dirpath: str = '.',
                ffilter: Callable[[Path], bool] = T,
-               dfilter: Callable[[Path], bool] = T) -> Generator[Path]: pass
+               dfilter: Callable[[Path], bool] = T,
+               include: Optional[Patterns] = None,
+               exclude: Optional[Patterns] = None,
+               max_depth: Optional[int] = None,
+               skip_hidden: bool = False) -> Generator[Path]: pass
+
+
+class WalkEntry(object):
+    entry: os.DirEntry
+    _path: Optional[Path]
+
+    def __init__(self, entry: os.DirEntry) -> None: pass
+
+    @property
+    def name(self) -> str: pass
+
+    @property
+    def path(self) -> str: pass
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool: pass
+
+    def is_file(self, follow_symlinks: bool = True) -> bool: pass
+
+    def is_symlink(self) -> bool: pass
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result: pass
+
+    def inode(self) -> int: pass
+
+    def as_path(self) -> Path: pass
+
+    def __fspath__(self) -> str: pass
+
+
+_GLOB_CHARS: Pattern
+
+
+def compile_patterns(patterns: Optional[Patterns]) -> Optional[Callable[[str], bool]]: pass
+
+
+def _is_hidden(name: str) -> bool: pass
+
+
+def _exclusion(exclude: Optional[Patterns], skip_hidden: bool) -> Optional[Callable[[str], bool]]: pass
+
+
+def _scandir_bfs(dirpath: str,
+                 wrap: Callable[[os.DirEntry], Any],
+                 ffilter: Optional[Callable[[Any], bool]],
+                 dfilter: Optional[Callable[[Any], bool]],
+                 include: Optional[Patterns] = None,
+                 exclude: Optional[Patterns] = None,
+                 max_depth: Optional[int] = None,
+                 skip_hidden: bool = False) -> Generator[Any]: pass
+
+
+def rscandir(dirpath: str = '.',
+             ffilter: Optional[Callable[[WalkEntry], bool]] = None,
+             dfilter: Optional[Callable[[WalkEntry], bool]] = None,
+             include: Optional[Patterns] = None,
+             exclude: Optional[Patterns] = None,
+             max_depth: Optional[int] = None,
+             skip_hidden: bool = False) -> Generator[WalkEntry]: pass
+
+
+def _list_entries(dirpath: str,
+                  ordered: bool,
+                  excluded: Optional[Callable[[str], bool]]) -> List[Tuple[str, str, bool]]: pass
+
+
+def prlist_dir(dirpath: str = '.',
+               ffilter: Optional[Callable[[Path], bool]] = None,
+               dfilter: Optional[Callable[[Path], bool]] = None,
+               workers: int = 8,
+               max_pending: Optional[int] = None,
+               ordered: bool = False,
+               include: Optional[Patterns] = None,
+               exclude: Optional[Patterns] = None,
+               max_depth: Optional[int] = None,
+               skip_hidden: bool = False) -> Generator[Path]: pass